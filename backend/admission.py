@@ -0,0 +1,84 @@
+"""
+Admission control for routes that wait on slow dependencies.
+
+Each route class has an AdmissionGate: `limit` requests run at once and up
+to `queue` more may wait at most `max_wait` seconds for a slot. Anything
+beyond that is rejected straight away, so a slow dependency can only hold
+`limit + queue` workers and the caller can answer 503 with Retry-After
+instead of queueing. Admitted requests carry a Deadline that caps the
+timeouts of the calls they make downstream.
+"""
+
+import math
+import threading
+import time
+
+
+class Overloaded(Exception):
+    """Raised when a gate has no free slot and no room left in its wait queue"""
+
+    def __init__(self, route_class, retry_after):
+        super().__init__(f'{route_class} is over capacity')
+        self.route_class = route_class
+        self.retry_after = retry_after
+
+
+class Deadline:
+    """Point in time by which a request must be answered"""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.clock = clock
+        self.expires = clock() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - self.clock())
+
+    def timeout(self, default):
+        """`default` clamped to the time left; 0 once the deadline has passed"""
+        return min(default, self.remaining())
+
+
+class AdmissionGate:
+    """Concurrency limit with a short, bounded wait queue"""
+
+    def __init__(self, route_class, limit, queue=0, max_wait=0.0, retry_after=1.0):
+        self.route_class = route_class
+        self.limit = limit
+        self.queue = queue
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._slots = threading.Semaphore(limit)
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take a slot, waiting at most min(max_wait, timeout); raises Overloaded otherwise"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.queue:
+                    self.rejected += 1
+                    raise self._overloaded()
+                self.waiting += 1
+            wait = self.max_wait if timeout is None else min(self.max_wait, timeout)
+            try:
+                admitted = wait > 0 and self._slots.acquire(timeout=wait)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            if not admitted:
+                with self._lock:
+                    self.rejected += 1
+                raise self._overloaded()
+        with self._lock:
+            self.active += 1
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    def _overloaded(self):
+        # Retry-After is whole seconds
+        return Overloaded(self.route_class, max(1, math.ceil(self.retry_after)))
@@ -0,0 +1,164 @@
+"""
+In-memory price alert evaluator.
+
+For every coin the book keeps the active thresholds of each direction in a
+sorted NumPy array. When a coin moves from `old` to `new`, the alerts that
+fired are exactly the thresholds in (old, new] for 'above' alerts and in
+[new, old) for 'below' alerts - two binary searches and a contiguous slice,
+so a tick costs O(log n + fired) no matter how many alerts exist.
+
+Fired and deleted alerts are tombstoned and compacted away once they make
+up half of a side, which keeps that cost amortized.
+"""
+
+import threading
+
+import numpy as np
+
+DIRECTIONS = ('above', 'below')
+
+
+class _Side:
+    """Sorted thresholds for one coin and one direction"""
+
+    def __init__(self):
+        self.thresholds = np.empty(0)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.alive = np.empty(0, dtype=bool)
+        self.dead = 0
+        self.pending = []
+
+    def __len__(self):
+        return len(self.ids) - self.dead + len(self.pending)
+
+    def flush(self):
+        """Merge alerts added since the last tick into the sorted arrays"""
+        if not self.pending:
+            return
+        ids, thresholds = zip(*self.pending)
+        self.pending = []
+        self._rebuild(
+            np.concatenate([self.thresholds[self.alive], np.asarray(thresholds, dtype=np.float64)]),
+            np.concatenate([self.ids[self.alive], np.asarray(ids, dtype=np.int64)])
+        )
+
+    def fire(self, lo, hi):
+        if hi <= lo:
+            return []
+        window = self.alive[lo:hi]
+        fired = self.ids[lo:hi][window]
+        if fired.size:
+            window[:] = False
+            self.dead += int(fired.size)
+            self._maybe_compact()
+        return fired.tolist()
+
+    def remove(self, alert_id):
+        for i, (pending_id, _) in enumerate(self.pending):
+            if pending_id == alert_id:
+                del self.pending[i]
+                return True
+        hits = np.flatnonzero((self.ids == alert_id) & self.alive)
+        if hits.size == 0:
+            return False
+        self.alive[hits] = False
+        self.dead += int(hits.size)
+        self._maybe_compact()
+        return True
+
+    def _maybe_compact(self):
+        if self.dead * 2 >= len(self.ids):
+            self._rebuild(self.thresholds[self.alive], self.ids[self.alive])
+
+    def _rebuild(self, thresholds, ids):
+        order = np.argsort(thresholds, kind='stable')
+        self.thresholds = thresholds[order]
+        self.ids = ids[order]
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.dead = 0
+
+
+class AlertBook:
+    """Active alerts indexed by coin and direction"""
+
+    def __init__(self):
+        self.prices = {}
+        self.loaded = False
+        self._sides = {}
+        self._where = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._where)
+
+    def load(self, alerts):
+        """Bulk-load (alert_id, crypto_id, direction, threshold) rows, replacing the book"""
+        grouped = {}
+        for alert_id, crypto_id, direction, threshold in alerts:
+            grouped.setdefault((crypto_id, direction), []).append((alert_id, threshold))
+        with self._lock:
+            self._sides = {}
+            self._where = {}
+            for (crypto_id, direction), rows in grouped.items():
+                side = self._side(crypto_id, direction)
+                ids, thresholds = zip(*rows)
+                side._rebuild(np.asarray(thresholds, dtype=np.float64), np.asarray(ids, dtype=np.int64))
+                for alert_id in ids:
+                    self._where[alert_id] = (crypto_id, direction)
+            self.loaded = True
+
+    def add(self, alert_id, crypto_id, direction, threshold):
+        if direction not in DIRECTIONS:
+            raise ValueError(f'Invalid direction: {direction}')
+        with self._lock:
+            self._side(crypto_id, direction).pending.append((alert_id, float(threshold)))
+            self._where[alert_id] = (crypto_id, direction)
+
+    def remove(self, alert_id):
+        with self._lock:
+            where = self._where.pop(alert_id, None)
+            if where is None:
+                return False
+            return self._sides[where].remove(alert_id)
+
+    def evaluate(self, crypto_id, price):
+        """Move a coin to `price` and return the ids of alerts that fired"""
+        with self._lock:
+            old = self.prices.get(crypto_id)
+            self.prices[crypto_id] = price
+            fired = []
+            # Alive alerts never hold at the last price, so only the crossed range can fire.
+            # Alerts added since then may already hold, so a flush widens the range to every
+            # threshold the new price satisfies - never past the new price itself.
+            above = self._sides.get((crypto_id, 'above'))
+            if above is not None:
+                lo = 0 if old is None or above.pending else int(np.searchsorted(above.thresholds, old, side='right'))
+                above.flush()
+                fired += above.fire(lo, int(np.searchsorted(above.thresholds, price, side='right')))
+            below = self._sides.get((crypto_id, 'below'))
+            if below is not None:
+                hi = None if old is None or below.pending else int(np.searchsorted(below.thresholds, old, side='left'))
+                below.flush()
+                lo = int(np.searchsorted(below.thresholds, price, side='left'))
+                fired += below.fire(lo, len(below.ids) if hi is None else hi)
+            for alert_id in fired:
+                self._where.pop(alert_id, None)
+            return fired
+
+    def evaluate_snapshot(self, snapshot):
+        """Evaluate every coin with alerts against a MarketSnapshot; returns [(alert_id, price)]"""
+        prices = snapshot.column('current_price') if len(snapshot) else None
+        fired = []
+        for crypto_id in {crypto_id for crypto_id, _ in list(self._sides)}:
+            row = snapshot.index.get(crypto_id)
+            if row is None or prices[row] != prices[row]:
+                continue
+            price = float(prices[row])
+            fired.extend((alert_id, price) for alert_id in self.evaluate(crypto_id, price))
+        return fired
+
+    def _side(self, crypto_id, direction):
+        side = self._sides.get((crypto_id, direction))
+        if side is None:
+            side = self._sides[(crypto_id, direction)] = _Side()
+        return side
@@ -1,41 +1,108 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, current_app, request, jsonify, stream_with_context, g
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity, verify_jwt_in_request
 from flask_cors import CORS
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from werkzeug.security import generate_password_hash, check_password_hash
 import hashlib
 import secrets
 import requests
 from datetime import datetime, timedelta, timezone
 import os
+import time
+import logging
+import threading
+from functools import partial, wraps
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from dotenv import load_dotenv
+from candles import CandleEngine, COLUMNS as CANDLE_COLUMNS, RESOLUTIONS as CANDLE_RESOLUTIONS
+from market_poller import MarketPoller, now_ms
+from tick_archive import TickArchive
+from market_universe import MarketUniverse, FIELDS as MARKET_FIELDS, NUMERIC_FIELDS as MARKET_NUMERIC_FIELDS
+from ttl_cache import TTLCache
+from correlation import CorrelationCache, SeriesUnavailable
+from movers import MoversBoard
+from market_global import GlobalMarket
+from alerts import AlertBook, DIRECTIONS as ALERT_DIRECTIONS
+from portfolio import Valuation, value_history
+from sparklines import SparklineBook
+from export import FORMATS as EXPORT_FORMATS, export_rows, gzip_stream
+from metrics import Registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from request_log import RequestSampler, setup_logging
+from admission import AdmissionGate, Deadline, Overloaded
+import profiling
+import numpy as np
 
-# Load environment variables
-load_dotenv()
+def load_config(app):
+    """Populate app.config from the environment (and .env)"""
+    load_dotenv()
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'super-secret-key-for-development-only')
+    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-super-secret-key-for-development-only')
+    # app.config['SECRET_KEY'] = 'super-secret-key-for-development-only'
+    # app.config['JWT_SECRET_KEY'] = 'jwt-super-secret-key-for-development-only'
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)  # Extended for testing
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///crypto_tracker.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['COINGECKO_BASE_URL'] = os.getenv('COINGECKO_BASE_URL', 'https://api.coingecko.com/api/v3')
+    app.config['MARKET_POLLER_ENABLED'] = os.getenv('MARKET_POLLER_ENABLED', 'false').lower() == 'true'
+    app.config['MARKET_POLL_INTERVAL'] = float(os.getenv('MARKET_POLL_INTERVAL', '30'))
+    app.config['MARKET_SNAPSHOT_MAX_AGE'] = float(os.getenv('MARKET_SNAPSHOT_MAX_AGE', '60'))
+    app.config['GLOBAL_HISTORY_POINTS'] = int(os.getenv('GLOBAL_HISTORY_POINTS', '2880'))
+    app.config['CHART_CACHE_TTL'] = float(os.getenv('CHART_CACHE_TTL', '300'))
+    app.config['MARKET_CACHE_TTL'] = float(os.getenv('MARKET_CACHE_TTL', '30'))
+    app.config['UPSTREAM_POOL_SIZE'] = int(os.getenv('UPSTREAM_POOL_SIZE', '8'))
+    app.config['DATA_BATCH_MAX'] = int(os.getenv('DATA_BATCH_MAX', '20'))
+    app.config['ALERTS_PER_USER_MAX'] = int(os.getenv('ALERTS_PER_USER_MAX', '100'))
+    app.config['ADMIN_EMAILS'] = {email.strip().lower() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()}
+    app.config['CORRELATION_MAX_COINS'] = int(os.getenv('CORRELATION_MAX_COINS', '25'))
+    app.config['EXPORT_MAX_COINS'] = int(os.getenv('EXPORT_MAX_COINS', '50'))
+    app.config['HASHING_POOL_SIZE'] = int(os.getenv('HASHING_POOL_SIZE', str(os.cpu_count() or 2)))
+    app.config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', 'INFO').upper()
+    app.config['LOG_SAMPLE_RATE'] = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+    app.config['PROFILING_ENABLED'] = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+    app.config['PROFILING_SECRET'] = os.getenv('PROFILING_SECRET', '')
+    app.config['PROFILING_SAMPLE_RATE'] = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+    app.config['PROFILING_DIR'] = os.getenv('PROFILING_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config['PROFILING_MAX_PROFILES'] = int(os.getenv('PROFILING_MAX_PROFILES', '50'))
+    app.config['TICK_ARCHIVE_DIR'] = os.getenv('TICK_ARCHIVE_DIR', os.path.join(app.instance_path, 'ticks'))
+    app.config['REQUEST_TIMEOUT'] = float(os.getenv('REQUEST_TIMEOUT', '10'))
+    app.config['ADMISSION_MAX_WAIT'] = float(os.getenv('ADMISSION_MAX_WAIT', '0.25'))
+    app.config['ADMISSION_RETRY_AFTER'] = float(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+    app.config['ADMISSION_UPSTREAM_LIMIT'] = int(os.getenv('ADMISSION_UPSTREAM_LIMIT', '16'))
+    app.config['ADMISSION_UPSTREAM_QUEUE'] = int(os.getenv('ADMISSION_UPSTREAM_QUEUE', '16'))
+    app.config['ADMISSION_AUTH_LIMIT'] = int(os.getenv('ADMISSION_AUTH_LIMIT', str(2 * app.config['HASHING_POOL_SIZE'])))
+    app.config['ADMISSION_AUTH_QUEUE'] = int(os.getenv('ADMISSION_AUTH_QUEUE', '32'))
 
-app = Flask(__name__)
+# Extensions, bound to an app by create_app
+db = SQLAlchemy()
+jwt = JWTManager()
+api = Blueprint('api', __name__)
 
-# Configuration
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'super-secret-key-for-development-only')
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-super-secret-key-for-development-only')
-# app.config['SECRET_KEY'] = 'super-secret-key-for-development-only'
-# app.config['JWT_SECRET_KEY'] = 'jwt-super-secret-key-for-development-only'
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)  # Extended for testing
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///crypto_tracker.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-print(f"🔧 JWT_SECRET_KEY configured: {app.config['JWT_SECRET_KEY'][:20]}...")
-
-# Initialize extensions
-db = SQLAlchemy(app)
-jwt = JWTManager(app)
-CORS(app, origins=[
+CORS_ORIGINS = [
     'http://localhost:8080', 
     'https://your-frontend-domain.com',
     'https://id-preview--d539e311-f3ec-4617-a26d-5adc220c40e2.lovable.app',
     'https://d539e311-f3ec-4617-a26d-5adc220c40e2.lovableproject.com',
     'https://preview.lovable.dev'
-], supports_credentials=True)
+]
+
+# Metrics (process-wide, shared by every app instance)
+metrics = Registry()
+http_requests = metrics.counter('crypto_tracker_http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+http_latency = metrics.histogram('crypto_tracker_http_request_duration_seconds', 'HTTP request latency', ('method', 'route'))
+upstream_requests = metrics.counter('crypto_tracker_upstream_requests_total', 'CoinGecko requests by endpoint and status', ('endpoint', 'status'))
+upstream_latency = metrics.histogram('crypto_tracker_upstream_request_duration_seconds', 'CoinGecko request latency', ('endpoint',))
+db_query_latency = metrics.histogram('crypto_tracker_db_query_duration_seconds', 'Database query latency', ('operation',))
+hashing_queue_depth = metrics.gauge('crypto_tracker_hashing_pool_queue_depth', 'Password hashes waiting for a hashing pool worker')
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    db_query_latency.observe(time.perf_counter() - context.query_started, statement.lstrip().split(None, 1)[0].upper())
 
 # Models
 class User(db.Model):
@@ -48,6 +115,8 @@ class User(db.Model):
     
     # Relationship
     favorites = db.relationship('Favorite', backref='user', lazy=True, cascade='all, delete-orphan')
+    alerts = db.relationship('PriceAlert', backref='user', lazy=True, cascade='all, delete-orphan')
+    holdings = db.relationship('Holding', backref='user', lazy=True, cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<User {self.email}>'
@@ -76,25 +145,507 @@ class Favorite(db.Model):
             'added_at': self.added_at.isoformat()
         }
 
+class PriceAlert(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    crypto_id = db.Column(db.String(100), nullable=False)
+    direction = db.Column(db.String(5), nullable=False)  # 'above' or 'below'
+    threshold = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    triggered_at = db.Column(db.DateTime, index=True)
+    triggered_price = db.Column(db.Float)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'crypto_id': self.crypto_id,
+            'direction': self.direction,
+            'threshold': self.threshold,
+            'created_at': self.created_at.isoformat(),
+            'triggered_at': self.triggered_at.isoformat() if self.triggered_at else None,
+            'triggered_price': self.triggered_price
+        }
+
+class Holding(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    crypto_id = db.Column(db.String(100), nullable=False)
+    quantity = db.Column(db.Float, nullable=False)
+    cost_basis = db.Column(db.Float, nullable=False, default=0.0)  # total USD paid for the position
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    # Unique constraint
+    __table_args__ = (db.UniqueConstraint('user_id', 'crypto_id'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'crypto_id': self.crypto_id,
+            'quantity': self.quantity,
+            'cost_basis': self.cost_basis,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+# Market data pipeline
+def coingecko_get(endpoint, path, params, timeout=10, deadline=None):
+    """GET a CoinGecko API path, recording latency and status under `endpoint`.
+
+    The timeout is clamped to what is left of `deadline` (default: the
+    current request's); an exhausted deadline raises Timeout without a call.
+    """
+    deadline = deadline or g.get('deadline')
+    if deadline is not None:
+        timeout = deadline.timeout(timeout)
+        if timeout <= 0:
+            upstream_requests.inc(endpoint, 'deadline')
+            raise requests.exceptions.Timeout('Request deadline exceeded')
+    started = time.perf_counter()
+    status = 'error'
+    try:
+        response = requests.get(f"{current_app.config['COINGECKO_BASE_URL']}{path}", params=params, timeout=timeout)
+        status = str(response.status_code)
+        return response
+    except requests.exceptions.Timeout:
+        status = 'timeout'
+        raise
+    finally:
+        upstream_latency.observe(time.perf_counter() - started, endpoint)
+        upstream_requests.inc(endpoint, status)
+
+def fetch_market_snapshot():
+    """Fetch the current /coins/markets page used as the poller's tick source"""
+    response = coingecko_get('markets', '/coins/markets', {
+        'vs_currency': 'usd',
+        'order': 'market_cap_desc',
+        'per_page': 250,
+        'page': 1,
+        'sparkline': False,
+        'price_change_percentage': '24h'
+    })
+    response.raise_for_status()
+    return response.json()
+
+def evaluate_alerts(app, alert_book, previous, current):
+    """Fire alerts crossed by the new snapshot and record them in one batched write"""
+    with app.app_context():
+        if not alert_book.loaded:
+            alert_book.load(
+                db.session.query(PriceAlert.id, PriceAlert.crypto_id, PriceAlert.direction, PriceAlert.threshold)
+                .filter(PriceAlert.triggered_at.is_(None))
+                .all()
+            )
+        fired = alert_book.evaluate_snapshot(current)
+        if not fired:
+            return
+        triggered_at = datetime.now(timezone.utc)
+        db.session.bulk_update_mappings(PriceAlert, [
+            {'id': alert_id, 'triggered_at': triggered_at, 'triggered_price': price}
+            for alert_id, price in fired
+        ])
+        db.session.commit()
+
+def in_app_context(app, func, *args):
+    """Run `func(*args)` inside an app context; for work handed to poller and pool threads"""
+    with app.app_context():
+        return func(*args)
+
+# Route classes with their own admission gate: views that may wait on CoinGecko, and
+# register/login, which wait on the PBKDF2 hashing pool
+ROUTE_CLASSES = ('upstream', 'auth')
+
+class Services:
+    """Per-app market pipeline, caches and worker pools, each built on first use"""
+
+    def __init__(self, app):
+        self.app = app
+        self.request_sampler = RequestSampler(app.config['LOG_SAMPLE_RATE'])
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        # Only called for attributes that don't exist yet
+        builder = Services._BUILDERS.get(name)
+        if builder is None:
+            raise AttributeError(name)
+        with self._lock:
+            if name not in self.__dict__:
+                builder(self)
+        return self.__dict__[name]
+
+    def _build_market(self):
+        config = self.app.config
+        self.candle_engine = CandleEngine()
+        self.tick_archive = TickArchive(config['TICK_ARCHIVE_DIR'])
+        self.market_universe = MarketUniverse()
+        self.market_refresh = threading.Lock()
+        self.movers_board = MoversBoard()
+        self.market_universe.subscribe(self.movers_board.update)
+        self.global_market = GlobalMarket(history_points=config['GLOBAL_HISTORY_POINTS'])
+        self.market_universe.subscribe(self.global_market.update)
+        self.alert_book = AlertBook()
+        self.market_universe.subscribe(partial(evaluate_alerts, self.app, self.alert_book))
+        self.sparkline_book = SparklineBook(load_sparkline_series)
+        poller = MarketPoller(partial(in_app_context, self.app, fetch_market_snapshot), interval=config['MARKET_POLL_INTERVAL'])
+        poller.subscribe(self.market_universe.rebuild)
+        poller.subscribe(self.candle_engine.ingest_snapshot)
+        poller.subscribe(self.tick_archive.append_snapshot)
+        self.market_poller = poller
+
+    def _build_caches(self):
+        config = self.app.config
+        self.chart_cache = TTLCache(config['CHART_CACHE_TTL'], maxsize=512)
+        self.market_data_cache = TTLCache(config['MARKET_CACHE_TTL'], maxsize=256)
+        self.correlation_cache = CorrelationCache()
+
+    def _build_upstream_pool(self):
+        self.upstream_pool = ThreadPoolExecutor(max_workers=self.app.config['UPSTREAM_POOL_SIZE'], thread_name_prefix='upstream')
+
+    def _build_admission_gates(self):
+        config = self.app.config
+        self.admission_gates = {
+            route_class: AdmissionGate(route_class, config[f'ADMISSION_{route_class.upper()}_LIMIT'],
+                                       config[f'ADMISSION_{route_class.upper()}_QUEUE'],
+                                       config['ADMISSION_MAX_WAIT'], config['ADMISSION_RETRY_AFTER'])
+            for route_class in ROUTE_CLASSES
+        }
+
+    def _build_hashing_pool(self):
+        # PBKDF2 is CPU-bound; a bounded pool keeps login bursts from taking every core
+        self.hashing_pool = ThreadPoolExecutor(max_workers=self.app.config['HASHING_POOL_SIZE'], thread_name_prefix='hashing')
+
+    _BUILDERS = {
+        **dict.fromkeys(('candle_engine', 'tick_archive', 'market_universe', 'market_refresh', 'movers_board',
+                         'global_market', 'alert_book', 'sparkline_book', 'market_poller'), _build_market),
+        **dict.fromkeys(('chart_cache', 'market_data_cache', 'correlation_cache'), _build_caches),
+        'upstream_pool': _build_upstream_pool,
+        'hashing_pool': _build_hashing_pool,
+        'admission_gates': _build_admission_gates,
+    }
+
+def services(app=None):
+    """The Services of `app`, by default the current app"""
+    return (app or current_app).extensions['crypto_tracker']
+
+# CoinGecko order names that don't match a column name
+MARKET_ORDER_ALIASES = {'volume': 'total_volume'}
+# Range filters: min_<name>/max_<name> query params and the column they bound
+MARKET_FILTERS = {'price': 'current_price', 'volume': 'total_volume', 'market_cap': 'market_cap'}
+
+def select_markets(snapshot, args):
+    """Apply markets query options (ids, min_*/max_* filters, order, per_page, page, fields) to the snapshot columns"""
+    order = args.get('order', 'market_cap_desc')
+    field, _, direction = order.rpartition('_')
+    field = MARKET_ORDER_ALIASES.get(field, field)
+    if field not in MARKET_NUMERIC_FIELDS or direction not in ('asc', 'desc'):
+        raise ValueError(f'Invalid order: {order}')
+    
+    try:
+        per_page = min(max(int(args.get('per_page', 100)), 1), 250)
+        page = max(int(args.get('page', 1)), 1)
+    except ValueError:
+        raise ValueError('per_page and page must be integers')
+    
+    fields = args['fields'].split(',') if args.get('fields') else None
+    if fields is not None and not set(fields) <= set(MARKET_FIELDS):
+        raise ValueError('Invalid fields')
+    
+    rows = None
+    if args.get('ids'):
+        rows = snapshot.rows(args['ids'].split(','))
+        rows = rows[rows >= 0]
+    
+    for name, column in MARKET_FILTERS.items():
+        try:
+            bounds = [float(args[key]) if args.get(key) else None for key in (f'min_{name}', f'max_{name}')]
+        except ValueError:
+            raise ValueError(f'min_{name} and max_{name} must be numbers')
+        if bounds != [None, None]:
+            rows = snapshot.where(column, *bounds, rows=rows)
+    
+    rows = snapshot.order(field, descending=direction == 'desc', limit=per_page * page, rows=rows)
+    return snapshot.project(rows[per_page * (page - 1):], fields)
+
+def cache_counts(attribute):
+    """Scrape-time callback reading a TTLCache counter for each payload cache of the current app"""
+    return lambda: {(name,): getattr(cache, attribute) for name, cache in payload_caches()}
+
+def payload_caches():
+    return (('chart', services().chart_cache), ('market_data', services().market_data_cache))
+
+metrics.counter('crypto_tracker_cache_hits_total', 'Upstream payload cache hits', ('cache',), callback=cache_counts('hits'))
+metrics.counter('crypto_tracker_cache_misses_total', 'Upstream payload cache misses', ('cache',), callback=cache_counts('misses'))
+metrics.gauge('crypto_tracker_cache_hit_ratio', 'Upstream payload cache hit ratio since start', ('cache',), callback=lambda: {
+    (name,): cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else float('nan')
+    for name, cache in payload_caches()
+})
+
+def gate_values(attribute):
+    """Scrape-time callback reading an AdmissionGate counter for each route class"""
+    return lambda: {(name,): getattr(gate, attribute) for name, gate in services().admission_gates.items()}
+
+metrics.gauge('crypto_tracker_admission_in_flight', 'Requests holding an admission slot', ('route_class',), callback=gate_values('active'))
+metrics.gauge('crypto_tracker_admission_waiting', 'Requests waiting for an admission slot', ('route_class',), callback=gate_values('waiting'))
+metrics.counter('crypto_tracker_admission_rejected_total', 'Requests shed with 503 by admission control', ('route_class',), callback=gate_values('rejected'))
+
+def chart_interval(days):
+    """CoinGecko chart granularity for a window: daily beyond 30 days, hourly otherwise"""
+    return 'daily' if int(days) > 30 else 'hourly'
+
+def fetch_market_chart(crypto_id, days, deadline=None, skip_cache=False):
+    """Fetch /coins/{id}/market_chart through the chart cache; returns (payload, status_code).
+
+    Callers that already missed the cache pass skip_cache, so the miss is counted once.
+    """
+    key = (crypto_id, str(int(days)))
+    if not skip_cache:
+        payload = services().chart_cache.get(key)
+        if payload is not None:
+            return payload, 200
+    
+    response = coingecko_get('market_chart', f'/coins/{crypto_id}/market_chart', {
+        'vs_currency': 'usd',
+        'days': days,
+        'interval': chart_interval(days)
+    }, deadline=deadline)
+    if response.status_code != 200:
+        return None, response.status_code
+    
+    payload = response.json()
+    services().chart_cache.set(key, payload)
+    return payload, 200
+
+def load_price_series(crypto_id, days, start, end):
+    """(timestamps, prices) for one coin from the tick archive, else the chart cache.
+
+    Raises SeriesUnavailable when the chart could not be fetched upstream.
+    """
+    first = services().tick_archive.first_ts(crypto_id)
+    if first is not None and first <= start:
+        data = services().tick_archive.range(crypto_id, start, end)
+        return data['timestamps'], data['price']
+    
+    payload, status = fetch_market_chart(crypto_id, days)
+    if payload is None:
+        raise SeriesUnavailable(crypto_id, status)
+    if not payload.get('prices'):
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    prices = np.asarray(payload['prices'], dtype=np.float64)
+    return prices[:, 0].astype(np.int64), prices[:, 1]
+
+def load_sparkline_series(crypto_id, start, end):
+    """(timestamps, prices) from the tick archive, else a cached 7-day chart; never calls upstream"""
+    data = services().tick_archive.range(crypto_id, start, end)
+    if data is not None and len(data['timestamps']):
+        return data['timestamps'], data['price']
+    
+    # Probed for every coin on each rebuild; peek() keeps that out of the hit ratio
+    payload = services().chart_cache.peek((crypto_id, '7'))
+    if payload is None or not payload.get('prices'):
+        return None
+    prices = np.asarray(payload['prices'], dtype=np.float64)
+    return prices[:, 0].astype(np.int64), prices[:, 1]
+
+# Defaults for the 'market' query of POST /api/crypto/data
+DEFAULT_MARKET_PARAMS = {
+    'vs_currency': 'usd',
+    'order': 'market_cap_desc',
+    'per_page': 100,
+    'page': 1,
+    'sparkline': False,
+    'price_change_percentage': '24h'
+}
+
+def canonical_params(params):
+    """Normalize query params so trivially different requests share a cache key"""
+    canonical = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        elif isinstance(value, float) and value.is_integer():
+            value = str(int(value))
+        else:
+            value = str(value).strip()
+            if value.lower() in ('true', 'false'):
+                value = value.lower()
+        canonical[str(key).strip()] = value
+    return tuple(sorted(canonical.items()))
+
+def data_query_key(query):
+    """Cache key for one {endpoint, params} query; raises ValueError if it is invalid"""
+    if not isinstance(query, dict):
+        raise ValueError('Invalid endpoint')
+    endpoint = query.get('endpoint')
+    params = query.get('params') or {}
+    if not isinstance(params, dict):
+        raise ValueError('params must be an object')
+    
+    if endpoint == 'market':
+        return ('market', canonical_params(dict(DEFAULT_MARKET_PARAMS, **params)))
+    if endpoint == 'chart':
+        days = str(params.get('days', '7')).strip()
+        if not days.isdigit():
+            raise ValueError('days must be an integer')
+        return ('chart', (str(params.get('id', 'bitcoin')).strip(), str(int(days))))
+    raise ValueError('Invalid endpoint')
+
+def cached_data_query(key):
+    if key[0] == 'market':
+        return services().market_data_cache.get(key)
+    return services().chart_cache.get(key[1])
+
+def fetch_data_query(key, deadline=None):
+    """Resolve one query key upstream; returns (payload, status_code)"""
+    if key[0] == 'chart':
+        return fetch_market_chart(*key[1], deadline=deadline, skip_cache=True)
+    
+    response = coingecko_get('markets', '/coins/markets', dict(key[1]), deadline=deadline)
+    if response.status_code != 200:
+        return None, response.status_code
+    payload = response.json()
+    services().market_data_cache.set(key, payload)
+    return payload, 200
+
+def run_data_queries(queries):
+    """Answer sub-queries from the caches, fetching misses upstream in parallel.
+
+    Returns one {'status', 'data'} or {'status', 'error'} result per query, in
+    order. Identical queries after canonicalization are fetched once.
+    """
+    results = [None] * len(queries)
+    pending = {}
+    for i, query in enumerate(queries):
+        try:
+            key = data_query_key(query)
+        except ValueError as e:
+            results[i] = {'status': 400, 'error': str(e)}
+            continue
+        payload = cached_data_query(key)
+        if payload is not None:
+            results[i] = {'status': 200, 'data': payload}
+        else:
+            pending.setdefault(key, []).append(i)
+    
+    # Pool threads have their own app context, so the deadline is passed along explicitly
+    app = current_app._get_current_object()
+    deadline = g.get('deadline')
+    futures = {key: services().upstream_pool.submit(in_app_context, app, fetch_data_query, key, deadline) for key in pending}
+    for key, future in futures.items():
+        try:
+            payload, status = future.result(timeout=deadline.remaining() if deadline else None)
+            if status == 200:
+                result = {'status': 200, 'data': payload}
+            else:
+                result = {'status': status, 'error': 'Failed to fetch crypto data'}
+        except (requests.exceptions.Timeout, FutureTimeout):
+            result = {'status': 504, 'error': 'Request timeout'}
+        except requests.exceptions.RequestException as e:
+            current_app.logger.error(f"Crypto API error: {str(e)}")
+            result = {'status': 503, 'error': 'Failed to fetch crypto data'}
+        for i in pending[key]:
+            results[i] = result
+    return results
+
+def _column_pairs(timestamps, values):
+    """Zip archive columns into [timestamp, value] pairs, mapping NaN to null"""
+    return [[t, None if v != v else v] for t, v in zip(timestamps, values.tolist())]
+
+def archived_chart(crypto_id, days):
+    """Build a market_chart payload from the tick archive if it covers the window"""
+    if not days.isdigit():
+        return None
+    interval = 86_400_000 if int(days) > 30 else 3_600_000
+    end = now_ms()
+    start = end - int(days) * 86_400_000
+    first = services().tick_archive.first_ts(crypto_id)
+    if first is None or first > start + interval:
+        return None
+    data = services().tick_archive.series(crypto_id, start, end, interval)
+    timestamps = data['timestamps'].tolist()
+    return {
+        'prices': _column_pairs(timestamps, data['price']),
+        'market_caps': _column_pairs(timestamps, data['market_cap']),
+        'total_volumes': _column_pairs(timestamps, data['volume'])
+    }
+
+def start_market_poller(app):
+    """Start the background market poller when enabled in config"""
+    if app.config['MARKET_POLLER_ENABLED']:
+        services(app).market_poller.start()
+        app.logger.info(f"Market poller running every {app.config['MARKET_POLL_INTERVAL']:g}s")
+
 # Helper functions
 def generate_salt():
     """Generate a random salt for password hashing"""
     return secrets.token_hex(32)
 
-def hash_password_pbkdf2(password, salt):
-    """Hash password using PBKDF2 with 100,000 iterations"""
+def _pbkdf2(password, salt):
+    hashing_queue_depth.dec()
     return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000).hex()
 
+def hash_password_pbkdf2(password, salt):
+    """Hash password using PBKDF2 with 100,000 iterations on the hashing pool"""
+    hashing_queue_depth.inc()
+    return services().hashing_pool.submit(_pbkdf2, password, salt).result()
+
 def verify_password(password, salt, hash_to_check):
     """Verify password against stored hash"""
     return hash_password_pbkdf2(password, salt) == hash_to_check
 
+# Admission control
+def request_timeout():
+    """Seconds the current request may take: REQUEST_TIMEOUT, or less if the client sends X-Request-Timeout"""
+    timeout = current_app.config['REQUEST_TIMEOUT']
+    try:
+        return min(timeout, max(0.0, float(request.headers.get('X-Request-Timeout', timeout))))
+    except ValueError:
+        return timeout
+
+def admit(route_class):
+    """Start the request deadline and take a slot of the route class's gate; raises Overloaded.
+
+    The caller must release the returned gate.
+    """
+    elapsed = time.perf_counter() - g.get('request_started', time.perf_counter())
+    g.deadline = Deadline(request_timeout() - elapsed)
+    gate = services().admission_gates[route_class]
+    gate.acquire(g.deadline.remaining())
+    return gate
+
+def shed(error):
+    """503 with Retry-After for a request admission control turned away"""
+    response = jsonify({'error': 'Server is busy, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def admitted(route_class):
+    """Run a view under its route class's admission gate, with a deadline for upstream calls.
+
+    Requests the gate can't take are shed rather than left holding a worker.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                gate = admit(route_class)
+            except Overloaded as e:
+                return shed(e)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                gate.release()
+        return wrapper
+    return decorator
+
 # Error handlers
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Resource not found'}), 404
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
@@ -104,31 +655,45 @@ def expired_token_callback(jwt_header, jwt_payload):
 
 @jwt.invalid_token_loader
 def invalid_token_callback(error):
-    print(f"🚫 INVALID TOKEN ERROR: {error}")
-    app.logger.error(f"Invalid token error: {error}")
+    current_app.logger.error(f"Invalid token error: {error}")
     return jsonify({'error': 'Invalid token'}), 401
 
 @jwt.unauthorized_loader
 def missing_token_callback(error):
-    print(f"🚫 MISSING TOKEN ERROR: {error}")
-    app.logger.error(f"Missing token error: {error}")
+    current_app.logger.error(f"Missing token error: {error}")
     return jsonify({'error': 'Authorization token is required'}), 401
 
-# Add request logging for debugging
-@app.before_request
-def log_request_info():
-    if request.path.startswith('/api'):
-        print(f"🌐 {request.method} {request.path}")
-        auth_header = request.headers.get('Authorization')
-        if auth_header:
-            print(f"🔑 Auth header received: {auth_header[:50]}...")
-        else:
-            print("🔑 No auth header found")
+@api.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@api.after_app_request
+def record_request(response):
+    """Record request metrics and a sampled access log entry (errors are always logged)"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    http_latency.observe(elapsed, request.method, route)
+    http_requests.inc(request.method, route, str(response.status_code))
+    
+    if request.path.startswith('/api') and services().request_sampler.sample(response.status_code):
+        current_app.logger.getChild('requests').log(logging.WARNING if response.status_code >= 500 else logging.INFO, 'request', extra={'fields': {
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 3),
+            'authenticated': 'Authorization' in request.headers,
+            'remote_addr': request.remote_addr
+        }})
+    return response
 
 # Routes
 
 # Health check
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
         'status': 'healthy',
@@ -136,8 +701,13 @@ def health_check():
         'version': '1.0.0'
     })
 
+@api.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return current_app.response_class(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 # Authentication endpoints
-@app.route('/api/auth/register', methods=['POST'])
+@api.route('/api/auth/register', methods=['POST'])
+@admitted('auth')
 def register():
     try:
         data = request.get_json()
@@ -189,10 +759,11 @@ def register():
         
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Registration error: {str(e)}")
+        current_app.logger.error(f"Registration error: {str(e)}")
         return jsonify({'error': 'Registration failed'}), 500
 
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/api/auth/login', methods=['POST'])
+@admitted('auth')
 def login():
     try:
         data = request.get_json()
@@ -227,10 +798,10 @@ def login():
         })
         
     except Exception as e:
-        app.logger.error(f"Login error: {str(e)}")
+        current_app.logger.error(f"Login error: {str(e)}")
         return jsonify({'error': 'Login failed'}), 500
 
-@app.route('/api/auth/me', methods=['GET'])
+@api.route('/api/auth/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
     try:
@@ -250,172 +821,355 @@ def get_current_user():
         })
         
     except Exception as e:
-        app.logger.error(f"Get user error: {str(e)}")
+        current_app.logger.error(f"Get user error: {str(e)}")
         return jsonify({'error': 'Failed to get user information'}), 500
 
 # JWT Test endpoint
-@app.route('/api/test-jwt', methods=['GET'])
+@api.route('/api/test-jwt', methods=['GET'])
 @jwt_required()
 def test_jwt():
     try:
         user_id = get_jwt_identity()
-        print(f"🧪 JWT Test successful, user_id: {user_id}")
         return jsonify({
             'message': 'JWT verification successful',
             'user_id': user_id,
-            'jwt_secret_key_hash': hashlib.sha256(app.config['JWT_SECRET_KEY'].encode()).hexdigest()[:16]
+            'jwt_secret_key_hash': hashlib.sha256(current_app.config['JWT_SECRET_KEY'].encode()).hexdigest()[:16]
         })
     except Exception as e:
-        print(f"🧪 JWT Test failed: {e}")
+        current_app.logger.warning(f"JWT test failed: {e}")
         return jsonify({'error': f'JWT test failed: {str(e)}'}), 401
 
+def refresh_market_snapshot():
+    """Refresh a stale market snapshot upstream, one request at a time.
+
+    Returns an error response, or None to serve the current snapshot.
+    """
+    universe = services().market_universe
+    max_age = current_app.config['MARKET_SNAPSHOT_MAX_AGE'] * 1000
+    if universe.is_fresh(now_ms(), max_age):
+        return None
+    # Single flight: while one request refreshes, the rest serve the stale snapshot (or wait if there is none yet)
+    refresh = services().market_refresh
+    if not refresh.acquire(blocking=not len(universe.snapshot)):
+        return None
+    try:
+        if universe.is_fresh(now_ms(), max_age):
+            return None
+        # Only the refresh is upstream-bound; when it can't be admitted, serve the stale snapshot
+        try:
+            gate = admit('upstream')
+        except Overloaded as e:
+            return None if len(universe.snapshot) else shed(e)
+        try:
+            params = {
+                'vs_currency': 'usd',
+                'order': 'market_cap_desc',
+                'per_page': 250,
+                'page': 1,
+                'sparkline': False,
+                'price_change_percentage': '24h'
+            }
+            
+            response = coingecko_get('markets', '/coins/markets', params)
+            
+            if response.status_code != 200:
+                return jsonify({'error': 'Failed to fetch crypto data'}), response.status_code
+            
+            services().market_poller.publish(response.json())
+        finally:
+            gate.release()
+    finally:
+        refresh.release()
+    return None
+
 # Crypto data endpoints
-@app.route('/api/crypto/markets', methods=['GET'])
+@api.route('/api/crypto/markets', methods=['GET'])
 def get_crypto_markets():
     try:
-        base_url = "https://api.coingecko.com/api/v3"
-        url = f"{base_url}/coins/markets"
-        params = {
-            'vs_currency': 'usd',
-            'order': 'market_cap_desc',
-            'per_page': 100,
-            'page': 1,
-            'sparkline': False,
-            'price_change_percentage': '24h'
-        }
+        error = refresh_market_snapshot()
+        if error is not None:
+            return error
         
-        response = requests.get(url, params=params, timeout=10)
+        sparkline = request.args.get('sparkline', 'false').lower()
+        if sparkline not in ('false', 'compact'):
+            return jsonify({'error': 'sparkline must be false or compact'}), 400
+        # Lines are looked up by coin id, so a projection has to keep it
+        if sparkline == 'compact' and request.args.get('fields') and 'id' not in request.args['fields'].split(','):
+            return jsonify({'error': 'sparkline=compact requires id in fields'}), 400
         
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({'error': 'Failed to fetch crypto data'}), response.status_code
+        snapshot = services().market_universe.snapshot
+        try:
+            coins = select_markets(snapshot, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Quantized 7-day trend lines; decode with min + points[i] / 254 * (max - min), 255 = no data
+        if sparkline == 'compact' and coins:
+            for coin, line in zip(coins, services().sparkline_book.get(snapshot, [coin['id'] for coin in coins])):
+                coin['sparkline_7d'] = line
+        
+        return jsonify(coins)
             
     except requests.exceptions.Timeout:
         return jsonify({'error': 'Request timeout'}), 504
     except requests.exceptions.RequestException as e:
-        app.logger.error(f"Crypto API error: {str(e)}")
+        current_app.logger.error(f"Crypto API error: {str(e)}")
         return jsonify({'error': 'Failed to fetch crypto data'}), 503
     except Exception as e:
-        app.logger.error(f"Crypto data error: {str(e)}")
+        current_app.logger.error(f"Crypto data error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/api/crypto/movers', methods=['GET'])
+def get_crypto_movers():
+    try:
+        kind = request.args.get('kind', 'gainers')
+        limit = request.args.get('limit', '10')
+        if not limit.isdigit():
+            return jsonify({'error': 'limit must be an integer'}), 400
+        
+        try:
+            body = services().movers_board.body(kind, int(limit))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if body is None:
+            return jsonify({'error': 'Market data not available yet'}), 503
+        
+        return current_app.response_class(body, mimetype='application/json')
+        
+    except Exception as e:
+        current_app.logger.error(f"Movers error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/api/crypto/global', methods=['GET'])
+def get_crypto_global():
+    try:
+        history = request.args.get('history', 'false').lower()
+        if history not in ('false', 'true'):
+            return jsonify({'error': 'history must be true or false'}), 400
+        
+        body = services().global_market.body(history == 'true')
+        if body is None:
+            return jsonify({'error': 'Market data not available yet'}), 503
+        
+        return current_app.response_class(body, mimetype='application/json')
+        
+    except Exception as e:
+        current_app.logger.error(f"Global market error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/api/crypto/correlation', methods=['GET'])
+@admitted('upstream')
+def get_crypto_correlation():
+    # Invalid tokens are rejected by the JWT error handlers; no token means anonymous
+    verify_jwt_in_request(optional=True)
+    try:
+        days = request.args.get('days', '30')
+        limit = request.args.get('limit', '10')
+        if not days.isdigit() or not 1 <= int(days) <= 365:
+            return jsonify({'error': 'days must be an integer between 1 and 365'}), 400
+        if not limit.isdigit():
+            return jsonify({'error': 'limit must be an integer'}), 400
+        days = int(days)
+        max_coins = current_app.config['CORRELATION_MAX_COINS']
+        
+        if request.args.get('ids'):
+            ids = [crypto_id for crypto_id in request.args['ids'].split(',') if crypto_id]
+        else:
+            # Default to the caller's favorites, then to the top coins by market cap
+            ids = []
+            user_id = get_jwt_identity()
+            if user_id is not None:
+                ids = [fav.crypto_id for fav in Favorite.query.filter_by(user_id=user_id).all()]
+            if not ids:
+                snapshot = services().market_universe.snapshot
+                ids = [snapshot.ids[row] for row in snapshot.order('market_cap', limit=min(int(limit), max_coins))]
+        
+        ids = sorted(set(ids))
+        if len(ids) < 2:
+            return jsonify({'error': 'At least two cryptocurrencies are required'}), 400
+        if len(ids) > max_coins:
+            return jsonify({'error': f'At most {max_coins} cryptocurrencies are allowed'}), 400
+        
+        interval = 86_400_000 if chart_interval(days) == 'daily' else 3_600_000
+        ids, observations, matrix = services().correlation_cache.get(
+            ids, days, interval,
+            lambda crypto_id, start, end: load_price_series(crypto_id, days, start, end),
+            now_ms()
+        )
+        
+        return jsonify({
+            'ids': ids,
+            'days': days,
+            'interval': chart_interval(days),
+            'observations': observations,
+            'matrix': [[None if v != v else round(v, 6) for v in row] for row in matrix.tolist()]
+        })
+        
+    except SeriesUnavailable as e:
+        current_app.logger.error(f"Correlation series error: {str(e)}")
+        return jsonify({'error': f'Failed to fetch chart data for {e.coin_id}'}), 503 if e.status == 429 else 502
+    except requests.exceptions.Timeout:
+        return jsonify({'error': 'Request timeout'}), 504
+    except requests.exceptions.RequestException as e:
+        current_app.logger.error(f"Correlation API error: {str(e)}")
+        return jsonify({'error': 'Failed to fetch chart data'}), 503
+    except Exception as e:
+        current_app.logger.error(f"Correlation error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/api/crypto/<crypto_id>/candles', methods=['GET'])
+def get_crypto_candles(crypto_id):
+    try:
+        resolution = request.args.get('res', '1h')
+        if resolution not in CANDLE_RESOLUTIONS:
+            return jsonify({'error': f"Invalid resolution, expected one of: {', '.join(CANDLE_RESOLUTIONS)}"}), 400
+        
+        try:
+            start = int(request.args['from']) if request.args.get('from') else None
+            end = int(request.args['to']) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({'error': 'from and to must be epoch milliseconds'}), 400
+        
+        candles = services().candle_engine.candles(crypto_id, resolution, start, end)
+        if candles is None:
+            return jsonify({'error': 'No candle data for this cryptocurrency'}), 404
+        
+        return jsonify({
+            'id': crypto_id,
+            'resolution': resolution,
+            'columns': CANDLE_COLUMNS,
+            'candles': candles
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f"Candle data error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/crypto/<crypto_id>/chart', methods=['GET'])
+@api.route('/api/crypto/<crypto_id>/chart', methods=['GET'])
+@admitted('upstream')
 def get_crypto_chart(crypto_id):
     try:
         days = request.args.get('days', '7')
-        base_url = "https://api.coingecko.com/api/v3"
-        url = f"{base_url}/coins/{crypto_id}/market_chart"
-        params = {
-            'vs_currency': 'usd',
-            'days': days,
-            'interval': 'daily' if int(days) > 30 else 'hourly'
-        }
+        archived = archived_chart(crypto_id, days)
+        if archived is not None:
+            return jsonify(archived)
         
-        response = requests.get(url, params=params, timeout=10)
+        payload, status = fetch_market_chart(crypto_id, days)
         
-        if response.status_code == 200:
-            return jsonify(response.json())
+        if status == 200:
+            return jsonify(payload)
         else:
-            return jsonify({'error': 'Failed to fetch chart data'}), response.status_code
+            return jsonify({'error': 'Failed to fetch chart data'}), status
             
     except requests.exceptions.Timeout:
         return jsonify({'error': 'Request timeout'}), 504
     except requests.exceptions.RequestException as e:
-        app.logger.error(f"Chart API error: {str(e)}")
+        current_app.logger.error(f"Chart API error: {str(e)}")
         return jsonify({'error': 'Failed to fetch chart data'}), 503
     except Exception as e:
-        app.logger.error(f"Chart data error: {str(e)}")
+        current_app.logger.error(f"Chart data error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/api/crypto/export', methods=['GET'])
+def export_crypto_history():
+    try:
+        fmt = request.args.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': f"Invalid format, expected one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        
+        ids = [crypto_id for crypto_id in request.args.get('ids', '').split(',') if crypto_id]
+        if not ids:
+            return jsonify({'error': 'ids is required'}), 400
+        if len(ids) > current_app.config['EXPORT_MAX_COINS']:
+            return jsonify({'error': f"At most {current_app.config['EXPORT_MAX_COINS']} ids per export"}), 400
+        
+        try:
+            start = int(request.args['from']) if request.args.get('from') else None
+            end = int(request.args['to']) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({'error': 'from and to must be epoch milliseconds'}), 400
+        
+        # Rows are produced while the response is sent; no Content-Length, so it goes out chunked
+        body = export_rows(services().tick_archive, ids, start, end, fmt)
+        headers = {'Content-Disposition': f'attachment; filename="price-history.{fmt}"', 'Vary': 'Accept-Encoding'}
+        if request.accept_encodings['gzip'] > 0:
+            body = gzip_stream(body)
+            headers['Content-Encoding'] = 'gzip'
+        
+        return current_app.response_class(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt], headers=headers)
+        
+    except Exception as e:
+        current_app.logger.error(f"Export error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/crypto/data', methods=['POST'])
+@api.route('/api/crypto/data', methods=['POST'])
+@admitted('upstream')
 def get_crypto_data():
     try:
         data = request.get_json()
-        endpoint = data.get('endpoint')
-        params = data.get('params', {})
         
-        base_url = 'https://api.coingecko.com/api/v3'
+        # Batch mode: an array of {endpoint, params} sub-queries
+        if isinstance(data, list):
+            if len(data) > current_app.config['DATA_BATCH_MAX']:
+                return jsonify({'error': f"At most {current_app.config['DATA_BATCH_MAX']} queries per batch"}), 400
+            return jsonify(run_data_queries(data))
         
-        if endpoint == 'market':
-            # Get market data
-            url = f"{base_url}/coins/markets"
-            default_params = {
-                'vs_currency': 'usd',
-                'order': 'market_cap_desc',
-                'per_page': 100,
-                'page': 1,
-                'sparkline': False,
-                'price_change_percentage': '24h'
-            }
-            default_params.update(params)
-            
-            response = requests.get(url, params=default_params, timeout=10)
-            
-        elif endpoint == 'chart':
-            # Get chart data
-            crypto_id = params.get('id', 'bitcoin')
-            days = params.get('days', '7')
-            url = f"{base_url}/coins/{crypto_id}/market_chart"
-            chart_params = {
-                'vs_currency': 'usd',
-                'days': days,
-                'interval': 'daily' if int(days) > 30 else 'hourly'
-            }
-            
-            response = requests.get(url, params=chart_params, timeout=10)
-            
-        else:
+        if not isinstance(data, dict):
             return jsonify({'error': 'Invalid endpoint'}), 400
         
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({'error': 'Failed to fetch crypto data'}), response.status_code
+        result = run_data_queries([data])[0]
+        if result['status'] == 200:
+            return jsonify(result['data'])
+        return jsonify({'error': result['error']}), result['status']
             
-    except requests.exceptions.Timeout:
-        return jsonify({'error': 'Request timeout'}), 504
-    except requests.exceptions.RequestException as e:
-        app.logger.error(f"Crypto API error: {str(e)}")
-        return jsonify({'error': 'Failed to fetch crypto data'}), 503
     except Exception as e:
-        app.logger.error(f"Crypto data error: {str(e)}")
+        current_app.logger.error(f"Crypto data error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
 # Custom JWT verification function for debugging
 def debug_jwt_verification():
     try:
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        print(f"✅ JWT verification successful, user_id: {user_id}")
-        return user_id
+        return get_jwt_identity()
     except Exception as e:
-        print(f"❌ JWT verification failed: {e}")
+        current_app.logger.debug(f"JWT verification failed: {e}")
         raise e
 
 # Favorites endpoints
-@app.route('/api/favorites', methods=['GET'])
+@api.route('/api/favorites', methods=['GET'])
 @jwt_required()
 def get_favorites():
     try:
-        print("🔍 GET /api/favorites - Starting JWT verification...")
         user_id = debug_jwt_verification()
         favorites = Favorite.query.filter_by(user_id=user_id).order_by(Favorite.added_at.desc()).all()
         
+        # Join live market data from the snapshot columns
+        snapshot = services().market_universe.snapshot
+        crypto_ids = [fav.crypto_id for fav in favorites]
+        live_prices = snapshot.lookup(crypto_ids, 'current_price')
+        live_changes = snapshot.lookup(crypto_ids, 'price_change_percentage_24h')
+        
+        favorites_data = []
+        for fav, live_price, live_change in zip(favorites, live_prices, live_changes):
+            fav_data = fav.to_dict()
+            fav_data['live_price'] = live_price
+            fav_data['price_change_percentage_24h'] = live_change
+            favorites_data.append(fav_data)
+        
         return jsonify({
-            'favorites': [fav.to_dict() for fav in favorites],
+            'favorites': favorites_data,
             'count': len(favorites)
         })
         
     except Exception as e:
-        app.logger.error(f"Get favorites error: {str(e)}")
+        current_app.logger.error(f"Get favorites error: {str(e)}")
         return jsonify({'error': 'Failed to get favorites'}), 500
 
-@app.route('/api/favorites', methods=['POST'])
+@api.route('/api/favorites', methods=['POST'])
 @jwt_required()
 def add_favorite():
     try:
-        print("🔍 POST /api/favorites - Starting JWT verification...")
         user_id = debug_jwt_verification()
         data = request.get_json()
         
@@ -452,14 +1206,13 @@ def add_favorite():
         
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Add favorite error: {str(e)}")
+        current_app.logger.error(f"Add favorite error: {str(e)}")
         return jsonify({'error': 'Failed to add favorite'}), 500
 
-@app.route('/api/favorites/<crypto_id>', methods=['DELETE'])
+@api.route('/api/favorites/<crypto_id>', methods=['DELETE'])
 @jwt_required()
 def remove_favorite(crypto_id):
     try:
-        print("🔍 DELETE /api/favorites - Starting JWT verification...")
         user_id = debug_jwt_verification()
         
         favorite = Favorite.query.filter_by(
@@ -477,28 +1230,312 @@ def remove_favorite(crypto_id):
         
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Remove favorite error: {str(e)}")
+        current_app.logger.error(f"Remove favorite error: {str(e)}")
         return jsonify({'error': 'Failed to remove favorite'}), 500
 
-# Initialize database
-def create_tables():
-    """Create database tables"""
+# Price alert endpoints
+@api.route('/api/alerts', methods=['GET'])
+@jwt_required()
+def get_alerts():
+    try:
+        user_id = get_jwt_identity()
+        alerts = PriceAlert.query.filter_by(user_id=user_id).order_by(PriceAlert.created_at.desc()).all()
+        
+        return jsonify({
+            'alerts': [alert.to_dict() for alert in alerts],
+            'count': len(alerts)
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f"Get alerts error: {str(e)}")
+        return jsonify({'error': 'Failed to get alerts'}), 500
+
+@api.route('/api/alerts', methods=['POST'])
+@jwt_required()
+def add_alert():
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        if not data or not data.get('crypto_id') or 'threshold' not in data:
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        direction = data.get('direction', 'above')
+        if direction not in ALERT_DIRECTIONS:
+            return jsonify({'error': 'direction must be "above" or "below"'}), 400
+        
+        try:
+            threshold = float(data['threshold'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'threshold must be a number'}), 400
+        if not threshold > 0:
+            return jsonify({'error': 'threshold must be positive'}), 400
+        
+        active = PriceAlert.query.filter_by(user_id=user_id, triggered_at=None).count()
+        if active >= current_app.config['ALERTS_PER_USER_MAX']:
+            return jsonify({'error': 'Alert limit reached'}), 400
+        
+        alert = PriceAlert(
+            user_id=user_id,
+            crypto_id=data['crypto_id'],
+            direction=direction,
+            threshold=threshold
+        )
+        
+        db.session.add(alert)
+        db.session.commit()
+        
+        # Before the first load the evaluator picks the alert up from the database
+        if services().alert_book.loaded:
+            services().alert_book.add(alert.id, alert.crypto_id, alert.direction, alert.threshold)
+        
+        return jsonify({
+            'message': 'Alert created successfully',
+            'alert': alert.to_dict()
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Add alert error: {str(e)}")
+        return jsonify({'error': 'Failed to add alert'}), 500
+
+@api.route('/api/alerts/<int:alert_id>', methods=['DELETE'])
+@jwt_required()
+def remove_alert(alert_id):
+    try:
+        user_id = get_jwt_identity()
+        
+        alert = PriceAlert.query.filter_by(id=alert_id, user_id=user_id).first()
+        
+        if not alert:
+            return jsonify({'error': 'Alert not found'}), 404
+        
+        db.session.delete(alert)
+        db.session.commit()
+        services().alert_book.remove(alert_id)
+        
+        return jsonify({'message': 'Alert removed successfully'})
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Remove alert error: {str(e)}")
+        return jsonify({'error': 'Failed to remove alert'}), 500
+
+# Portfolio endpoints
+def holdings_valuation(user_id=None):
+    """Value holdings (one user's, or everyone's) against the market snapshot in one pass"""
+    query = db.session.query(Holding.user_id, Holding.crypto_id, Holding.quantity, Holding.cost_basis)
+    if user_id is not None:
+        query = query.filter(Holding.user_id == user_id)
+    rows = query.all()
+    owners, crypto_ids, quantities, cost_basis = zip(*rows) if rows else ((), (), (), ())
+    return Valuation(owners, crypto_ids, quantities, cost_basis, services().market_universe.snapshot)
+
+@api.route('/api/portfolio/holdings', methods=['GET'])
+@jwt_required()
+def get_holdings():
+    try:
+        user_id = get_jwt_identity()
+        holdings = Holding.query.filter_by(user_id=user_id).order_by(Holding.crypto_id).all()
+        
+        return jsonify({
+            'holdings': [holding.to_dict() for holding in holdings],
+            'count': len(holdings)
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f"Get holdings error: {str(e)}")
+        return jsonify({'error': 'Failed to get holdings'}), 500
+
+@api.route('/api/portfolio/holdings/<crypto_id>', methods=['PUT'])
+@jwt_required()
+def set_holding(crypto_id):
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        if not data or 'quantity' not in data:
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        try:
+            quantity = float(data['quantity'])
+            cost_basis = float(data.get('cost_basis') or 0)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'quantity and cost_basis must be numbers'}), 400
+        if not quantity > 0 or cost_basis < 0:
+            return jsonify({'error': 'quantity must be positive and cost_basis non-negative'}), 400
+        
+        holding = Holding.query.filter_by(user_id=user_id, crypto_id=crypto_id).first()
+        created = holding is None
+        if created:
+            holding = Holding(user_id=user_id, crypto_id=crypto_id, quantity=quantity, cost_basis=cost_basis)
+            db.session.add(holding)
+        else:
+            holding.quantity = quantity
+            holding.cost_basis = cost_basis
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Holding saved successfully',
+            'holding': holding.to_dict()
+        }), 201 if created else 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Set holding error: {str(e)}")
+        return jsonify({'error': 'Failed to save holding'}), 500
+
+@api.route('/api/portfolio/holdings/<crypto_id>', methods=['DELETE'])
+@jwt_required()
+def remove_holding(crypto_id):
+    try:
+        user_id = get_jwt_identity()
+        
+        holding = Holding.query.filter_by(user_id=user_id, crypto_id=crypto_id).first()
+        
+        if not holding:
+            return jsonify({'error': 'Holding not found'}), 404
+        
+        db.session.delete(holding)
+        db.session.commit()
+        
+        return jsonify({'message': 'Holding removed successfully'})
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Remove holding error: {str(e)}")
+        return jsonify({'error': 'Failed to remove holding'}), 500
+
+@api.route('/api/portfolio/valuation', methods=['GET'])
+@jwt_required()
+def get_portfolio_valuation():
+    try:
+        user_id = get_jwt_identity()
+        valuation = holdings_valuation(user_id)
+        
+        return jsonify({
+            'summary': valuation.summary(user_id),
+            'holdings': valuation.holdings(user_id),
+            'prices_as_of': services().market_universe.snapshot.ts
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f"Portfolio valuation error: {str(e)}")
+        return jsonify({'error': 'Failed to value portfolio'}), 500
+
+@api.route('/api/portfolio/history', methods=['GET'])
+@jwt_required()
+def get_portfolio_history():
+    try:
+        user_id = get_jwt_identity()
+        days = request.args.get('days', '7')
+        if not days.isdigit() or not 1 <= int(days) <= 365:
+            return jsonify({'error': 'days must be an integer between 1 and 365'}), 400
+        
+        interval = 86_400_000 if chart_interval(days) == 'daily' else 3_600_000
+        end = now_ms()
+        start = end - int(days) * 86_400_000
+        
+        # Only locally stored series are used; coins without history are reported, not fetched
+        series, quantities, missing = [], [], []
+        for holding in Holding.query.filter_by(user_id=user_id).all():
+            data = services().tick_archive.range(holding.crypto_id, start - interval, end)
+            if data is None or len(data['timestamps']) == 0:
+                missing.append(holding.crypto_id)
+                continue
+            series.append((data['timestamps'], data['price']))
+            quantities.append(holding.quantity)
+        
+        grid, values = value_history(series, quantities, start, end, interval) if series else ([], [])
+        
+        return jsonify({
+            'days': int(days),
+            'interval': chart_interval(days),
+            'values': [[t, v] for t, v in zip(np.asarray(grid).tolist(), np.asarray(values).tolist())],
+            'missing': missing
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f"Portfolio history error: {str(e)}")
+        return jsonify({'error': 'Failed to get portfolio history'}), 500
+
+@api.route('/api/admin/portfolio-report', methods=['GET'])
+@jwt_required()
+def get_portfolio_report():
+    try:
+        user = User.query.get(get_jwt_identity())
+        if not user or user.email.lower() not in current_app.config['ADMIN_EMAILS']:
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        report = holdings_valuation().report()
+        
+        return jsonify({
+            'users': report,
+            'count': len(report),
+            'prices_as_of': services().market_universe.snapshot.ts
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f"Portfolio report error: {str(e)}")
+        return jsonify({'error': 'Failed to build portfolio report'}), 500
+
+# Application factory
+def create_app(config=None):
+    """Build a configured app; `config` overrides values read from the environment.
+
+    Nothing here touches the network, starts threads or creates tables: the
+    market pipeline, caches and pools are built on first use (see Services)
+    and the schema is created once with `init_db` / `flask --app app init-db`.
+    """
+    config = dict(config or {})
+    app = Flask(__name__)
+    load_config(app)
+    app.config.update(config)
+    
+    # Logging: JSON lines written by a background listener thread
+    setup_logging(app.logger, app.config['LOG_LEVEL'])
+    if not os.getenv('JWT_SECRET_KEY') and 'JWT_SECRET_KEY' not in config:
+        app.logger.warning('JWT_SECRET_KEY is not set, using the development default')
+    
+    db.init_app(app)
+    jwt.init_app(app)
+    CORS(app, origins=CORS_ORIGINS, supports_credentials=True)
+    app.extensions['crypto_tracker'] = Services(app)
+    app.register_blueprint(api)
+    
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create the database tables"""
+        init_db(app)
+    
+    # Opt-in profiling; when disabled no hooks are registered at all
+    if app.config['PROFILING_ENABLED']:
+        profiling.install(
+            app,
+            profiling.ProfileStore(app.config['PROFILING_DIR'], app.config['PROFILING_MAX_PROFILES']),
+            secret=app.config['PROFILING_SECRET'],
+            sample_rate=app.config['PROFILING_SAMPLE_RATE']
+        )
+    return app
+
+def init_db(app):
+    """Create database tables; a one-time setup step, not run on every start"""
     with app.app_context():
         db.create_all()
 
 if __name__ == '__main__':
-    # Create tables
-    create_tables()
+    app = create_app()
+    start_market_poller(app)
     
     print("🚀 Starting Crypto Tracker Backend...")
     print(f"📡 API available at: http://localhost:{int(os.getenv('PORT', 5000))}")
     print("📖 Health check: /api/health")
     print("🔐 Authentication endpoints: /api/auth/register, /api/auth/login")
-    print("💰 Crypto endpoints: /api/crypto/markets, /api/crypto/{id}/chart")
+    print("💰 Crypto endpoints: /api/crypto/markets, /api/crypto/{id}/chart, /api/crypto/{id}/candles")
     print("⭐ Favorites endpoints: /api/favorites")
     
     app.run(
         host='0.0.0.0',
         port=int(os.getenv('PORT', 5000)),
         debug=os.getenv('FLASK_ENV', 'development') == 'development'
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Admission control benchmark: local route latency while upstream is degraded.
+
+Serves the app from a fixed pool of --workers threads (like a gunicorn
+gthread worker), points it at a stub CoinGecko answering after
+--latency-ms, and floods it with cache-missing chart requests from
+--clients threads (which honour Retry-After) while a prober times
+GET /api/health. Runs once with admission effectively off (a gate larger
+than the flood) and once with --limit/--queue, and prints health latency
+plus chart outcomes for both.
+
+Usage: python benchmarks/bench_admission.py [--duration S] [--workers N] [--clients N] [--latency-ms N]
+       [--limit N] [--queue N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_coingecko import StubCoinGecko  # noqa: E402
+
+
+def serve(app, workers):
+    """Werkzeug server handling connections on a fixed-size thread pool"""
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+    class Handler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    class PooledServer(BaseWSGIServer):
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='worker')
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self.handle_connection, request, client_address)
+
+        def handle_connection(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    server = PooledServer('127.0.0.1', 0, app, handler=Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def run(args, base_url, root, limit, queue):
+    from app import create_app, init_db
+
+    app = create_app({
+        'COINGECKO_BASE_URL': base_url,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(root, f'admission-{limit}.db')}",
+        'TICK_ARCHIVE_DIR': os.path.join(root, f'ticks-{limit}'),
+        'LOG_LEVEL': 'ERROR',
+        'ADMISSION_UPSTREAM_LIMIT': limit,
+        'ADMISSION_UPSTREAM_QUEUE': queue,
+    })
+    init_db(app)
+    server, target = serve(app, args.workers)
+
+    deadline = time.perf_counter() + args.duration
+    outcomes = Counter()
+    health = []
+
+    def flood(index):
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+            # A new coin every time, so every request misses the chart cache
+            url = f'{target}/api/crypto/coin-{index * 100000 + n}/chart?days=1'
+            try:
+                response = requests.get(url, timeout=30, headers={'Connection': 'close'})
+            except requests.RequestException:
+                outcomes['error'] += 1
+                continue
+            outcomes[response.status_code] += 1
+            if 'Retry-After' in response.headers:
+                time.sleep(float(response.headers['Retry-After']))
+
+    def probe():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                requests.get(f'{target}/api/health', timeout=30, headers={'Connection': 'close'})
+            except requests.RequestException:
+                pass
+            health.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=flood, args=(i,)) for i in range(args.clients)] + [threading.Thread(target=probe)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    p50, p99 = np.percentile(health, [50, 99]) if health else (0, 0)
+    return {
+        'limit': limit,
+        'queue': queue,
+        'health_requests': len(health),
+        'health_p50_ms': round(float(p50), 2),
+        'health_p99_ms': round(float(p99), 2),
+        'health_max_ms': round(max(health, default=0), 2),
+        'chart_responses': {str(status): count for status, count in sorted(outcomes.items(), key=str)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--latency-ms', type=float, default=2000, help='stub upstream latency')
+    parser.add_argument('--limit', type=int, default=4)
+    parser.add_argument('--queue', type=int, default=2)
+    args = parser.parse_args()
+
+    stub = StubCoinGecko(latency_ms=args.latency_ms, coins=250).start()
+    with tempfile.TemporaryDirectory() as root:
+        results = {
+            'without_admission': run(args, stub.base_url, root, limit=args.clients * 4, queue=0),
+            'with_admission': run(args, stub.base_url, root, limit=args.limit, queue=args.queue),
+        }
+    stub.stop()
+    results['config'] = {
+        'duration': args.duration, 'workers': args.workers, 'clients': args.clients, 'latency_ms': args.latency_ms,
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
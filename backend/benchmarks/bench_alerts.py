@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Price alert benchmark: bisecting AlertBook vs. a loop over every alert.
+
+Loads --alerts random thresholds spread over --coins coins, then replays
+--ticks market snapshots with small random price moves.
+
+Usage: python benchmarks/bench_alerts.py [--alerts N] [--coins N] [--ticks N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerts import AlertBook  # noqa: E402
+from market_universe import MarketSnapshot  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--alerts', type=int, default=1_000_000)
+    parser.add_argument('--coins', type=int, default=1000)
+    parser.add_argument('--ticks', type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    coin_ids = [f'coin-{i}' for i in range(args.coins)]
+    base = rng.uniform(0.01, 50_000, args.coins)
+    coin_of = rng.integers(0, args.coins, args.alerts)
+    thresholds = base[coin_of] * rng.uniform(0.5, 1.5, args.alerts)
+    directions = np.where(thresholds > base[coin_of], 'above', 'below')
+    rows = list(zip(range(args.alerts), (coin_ids[c] for c in coin_of), directions.tolist(), thresholds.tolist()))
+
+    book = AlertBook()
+    started = time.perf_counter()
+    book.load(rows)
+    load_seconds = time.perf_counter() - started
+
+    prices = base.copy()
+    book.evaluate_snapshot(MarketSnapshot([{'id': c, 'current_price': p} for c, p in zip(coin_ids, prices)]))
+
+    tick_ms = []
+    fired = 0
+    for _ in range(args.ticks):
+        prices = prices * np.exp(rng.normal(0, 0.01, args.coins))
+        snapshot = MarketSnapshot([{'id': c, 'current_price': p} for c, p in zip(coin_ids, prices.tolist())])
+        t0 = time.perf_counter()
+        fired += len(book.evaluate_snapshot(snapshot))
+        tick_ms.append((time.perf_counter() - t0) * 1000)
+
+    # Naive design: check every alert against the old and new price on a single tick
+    old = dict(zip(coin_ids, prices.tolist()))
+    new_prices = prices * np.exp(rng.normal(0, 0.01, args.coins))
+    new = dict(zip(coin_ids, new_prices.tolist()))
+    t0 = time.perf_counter()
+    naive_fired = 0
+    for _, coin_id, direction, threshold in rows:
+        if direction == 'above':
+            naive_fired += old[coin_id] < threshold <= new[coin_id]
+        else:
+            naive_fired += old[coin_id] > threshold >= new[coin_id]
+    naive_ms = (time.perf_counter() - t0) * 1000
+
+    print(json.dumps({
+        'alerts': args.alerts,
+        'coins': args.coins,
+        'load_seconds': round(load_seconds, 3),
+        'ticks': args.ticks,
+        'fired_total': fired,
+        'tick_ms': {
+            'p50': round(float(np.percentile(tick_ms, 50)), 3),
+            'p99': round(float(np.percentile(tick_ms, 99)), 3),
+        },
+        'naive_tick_ms': round(naive_ms, 3),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Export benchmark: streamed CSV/NDJSON rows vs. building the whole response.
+
+Archives --rows hourly ticks for --coins coins in a temporary directory,
+then drains export_rows (optionally gzipped) and reports throughput and the
+peak Python heap allocation, next to a list-of-rows-then-dump baseline.
+
+Usage: python benchmarks/bench_export.py [--rows N] [--coins N] [--format csv|ndjson] [--gzip]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import export_rows, gzip_stream  # noqa: E402
+from tick_archive import TickArchive  # noqa: E402
+
+
+def drain(chunks):
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--coins', type=int, default=2)
+    parser.add_argument('--format', default='csv', choices=['csv', 'ndjson'])
+    parser.add_argument('--gzip', action='store_true')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        archive = TickArchive(root)
+        rng = np.random.default_rng(0)
+        ts = np.arange(args.rows, dtype=np.int64) * 3_600_000
+        ids = [f'coin-{i}' for i in range(args.coins)]
+        for coin_id in ids:
+            prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, args.rows)))
+            archive.extend(coin_id, ts, prices, prices * 1e6, prices * 1e5)
+        total_rows = args.rows * args.coins
+
+        def stream():
+            chunks = export_rows(archive, ids, None, None, args.format)
+            return drain(gzip_stream(chunks) if args.gzip else chunks)
+
+        # Timed without tracemalloc, which slows allocation-heavy code several times over
+        started = time.perf_counter()
+        size = stream()
+        streamed = time.perf_counter() - started
+        tracemalloc.start()
+        stream()
+        _, streamed_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Baseline: materialize every row, then serialize the whole document
+        def buffer():
+            rows = []
+            for coin_id in ids:
+                data = archive.range(coin_id)
+                rows.extend(
+                    {'id': coin_id, 'timestamp': t, 'price': p, 'market_cap': c, 'volume': v}
+                    for t, p, c, v in zip(data['timestamps'].tolist(), data['price'].tolist(),
+                                          data['market_cap'].tolist(), data['volume'].tolist())
+                )
+            return json.dumps(rows)
+
+        started = time.perf_counter()
+        buffer()
+        buffered = time.perf_counter() - started
+        tracemalloc.start()
+        buffer()
+        _, buffered_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        shutil.rmtree(root)
+
+    print(json.dumps({
+        'rows': total_rows,
+        'format': args.format,
+        'gzip': args.gzip,
+        'bytes': size,
+        'streamed_seconds': round(streamed, 3),
+        'streamed_rows_per_second': int(total_rows / streamed),
+        'streamed_peak_mib': round(streamed_peak / 2**20, 2),
+        'buffered_seconds': round(buffered, 3),
+        'buffered_peak_mib': round(buffered_peak / 2**20, 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
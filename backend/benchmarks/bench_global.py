@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Global market aggregates benchmark: per-snapshot update vs. re-encoding vs. per-request sums.
+
+Replays --ticks snapshots of --coins coins in which a --changed fraction
+of coins move each tick (and one coin is swapped out every --churn ticks).
+It times GlobalMarket.update, which appends one encoded point to the
+history ring. It compares that with an update that re-encodes the whole
+--history window each snapshot, and with summing the market list in
+Python on every request as clients do today. It also times serving the
+pre-serialized body.
+
+Usage: python benchmarks/bench_global.py [--coins N] [--ticks N] [--changed F] [--churn N] [--history N] [--requests N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_global import HISTORY_COLUMNS, GlobalMarket, aggregate  # noqa: E402
+from market_universe import MarketSnapshot  # noqa: E402
+
+
+def make_ticks(args):
+    rng = np.random.default_rng(0)
+    coins = [{
+        'id': 'bitcoin' if i == 0 else 'ethereum' if i == 1 else f'coin-{i}',
+        'market_cap': float(rng.uniform(1e6, 1e12)),
+        'total_volume': float(rng.uniform(1e4, 1e10)),
+        'market_cap_change_24h': float(rng.normal(0, 1e6)),
+        'price_change_percentage_24h': float(rng.normal()),
+    } for i in range(args.coins)]
+    ticks = []
+    for tick in range(args.ticks):
+        for i in rng.choice(args.coins, max(1, int(args.coins * args.changed)), replace=False):
+            coins[i] = dict(coins[i], market_cap=coins[i]['market_cap'] * float(rng.uniform(0.99, 1.01)),
+                            price_change_percentage_24h=float(rng.normal()))
+        if args.churn and tick % args.churn == args.churn - 1:
+            coins[-1] = dict(coins[-1], id=f'listed-{tick}')
+        ticks.append(MarketSnapshot(list(coins), ts=tick * 30_000, version=tick + 1))
+    return ticks, coins
+
+
+def replay(market, ticks):
+    previous = MarketSnapshot([])
+    started = time.perf_counter()
+    for snapshot in ticks:
+        market.update(previous, snapshot)
+        previous = snapshot
+    return (time.perf_counter() - started) / len(ticks)
+
+
+class ReencodingMarket:
+    """Same aggregates, but the history is a list re-encoded in full on every snapshot"""
+
+    def __init__(self, history_points):
+        self.history_points = history_points
+        self.points = []
+        self.body = None
+
+    def update(self, previous, current):
+        (total_cap, total_volume, cap_change), (declining, unchanged, advancing) = aggregate(current)
+        self.points = self.points[-(self.history_points - 1):] + [[current.ts, total_cap, total_volume, advancing, declining]]
+        self.body = json.dumps({
+            'total_market_cap': total_cap, 'total_volume': total_volume, 'market_cap_change_24h': cap_change,
+            'breadth': {'advancing': advancing, 'declining': declining, 'unchanged': unchanged},
+            'history': {'columns': HISTORY_COLUMNS, 'points': self.points},
+        }, separators=(',', ':')).encode()
+
+
+def client_sum(coins):
+    """What each client does per poll today: walk the market list"""
+    total_cap = sum(coin['market_cap'] or 0 for coin in coins)
+    by_id = {coin['id']: coin for coin in coins}
+    return json.dumps({
+        'total_market_cap': total_cap,
+        'total_volume': sum(coin['total_volume'] or 0 for coin in coins),
+        'btc_dominance': by_id['bitcoin']['market_cap'] / total_cap * 100,
+        'eth_dominance': by_id['ethereum']['market_cap'] / total_cap * 100,
+        'advancing': sum(1 for coin in coins if (coin['price_change_percentage_24h'] or 0) > 0),
+        'declining': sum(1 for coin in coins if (coin['price_change_percentage_24h'] or 0) < 0),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--coins', type=int, default=250)
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--changed', type=float, default=0.1, help='fraction of coins moving per tick')
+    parser.add_argument('--churn', type=int, default=50, help='swap one coin out every N ticks (0: never)')
+    parser.add_argument('--history', type=int, default=2880)
+    parser.add_argument('--requests', type=int, default=10000)
+    args = parser.parse_args()
+
+    ticks, coins = make_ticks(args)
+    market = GlobalMarket(history_points=args.history)
+    update_s = replay(market, ticks)
+    reencode_s = replay(ReencodingMarket(args.history), ticks)
+
+    started = time.perf_counter()
+    for _ in range(args.requests):
+        market.body(history=True)
+    serve_s = (time.perf_counter() - started) / args.requests
+
+    started = time.perf_counter()
+    for _ in range(200):
+        client_sum(coins)
+    client_s = (time.perf_counter() - started) / 200
+
+    print(json.dumps({
+        'update_us': round(update_s * 1e6, 1),
+        'update_reencoding_history_us': round(reencode_s * 1e6, 1),
+        'serve_body_us': round(serve_s * 1e6, 3),
+        'per_request_sum_us': round(client_s * 1e6, 1),
+        'history_body_bytes': len(market.body(history=True)),
+        'config': vars(args),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Market universe benchmark: list-of-dicts payload vs. struct-of-arrays snapshot.
+
+Reports retained memory, refresh (rebuild) time and top-N sort time for a
+synthetic /coins/markets payload of --coins entries.
+
+Usage: python benchmarks/bench_market_universe.py [--coins N] [--rounds N]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_universe import FIELDS, NUMERIC_FIELDS, MarketSnapshot, MarketUniverse  # noqa: E402
+
+
+def synthetic_payload(count, seed=7):
+    rng = random.Random(seed)
+    coins = []
+    for rank in range(1, count + 1):
+        coin = {field: rng.uniform(0.01, 1e9) for field in NUMERIC_FIELDS}
+        coin.update(
+            id=f'coin-{rank}', symbol=f'c{rank}', name=f'Coin {rank}',
+            image=f'https://assets.coingecko.com/coins/images/{rank}/large/coin.png',
+            ath_date='2021-11-10T14:24:11.849Z', atl_date='2015-10-20T00:00:00.000Z',
+            last_updated='2024-05-01T12:00:00.000Z', roi=None, market_cap_rank=rank,
+        )
+        coins.append({field: coin[field] for field in FIELDS})
+    return json.dumps(coins)
+
+
+def retained_bytes(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    value = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return value, size
+
+
+def best_of(rounds, fn):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(min(timings), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--coins', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--top', type=int, default=100)
+    args = parser.parse_args()
+
+    payload = synthetic_payload(args.coins)
+    universe = MarketUniverse()
+
+    dicts, dict_bytes = retained_bytes(lambda: json.loads(payload))
+    # The parsed payload is garbage once the snapshot is built, so only the columns are retained
+    snapshot, snapshot_bytes = retained_bytes(lambda: MarketSnapshot(json.loads(payload)))
+
+    print(json.dumps({
+        'coins': args.coins,
+        'memory_bytes': {
+            'list_of_dicts': dict_bytes,
+            'struct_of_arrays': snapshot_bytes,
+        },
+        'refresh_ms': {
+            'list_of_dicts': best_of(args.rounds, lambda: json.loads(payload)),
+            'struct_of_arrays': best_of(args.rounds, lambda: universe.rebuild(json.loads(payload))),
+        },
+        'top_by_volume_ms': {
+            'list_of_dicts': best_of(args.rounds, lambda: sorted(
+                dicts, key=lambda coin: coin['total_volume'] or 0, reverse=True)[:args.top]),
+            'struct_of_arrays': best_of(args.rounds, lambda: snapshot.order(
+                'total_volume', limit=args.top)),
+        },
+        'favorites_join_ms': {
+            'list_of_dicts': best_of(args.rounds, lambda: [
+                coin['current_price'] for coin in dicts if coin['id'] in {'coin-7', 'coin-42', 'coin-999'}]),
+            'struct_of_arrays': best_of(args.rounds, lambda: snapshot.lookup(
+                ['coin-7', 'coin-42', 'coin-999'], 'current_price')),
+        },
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Metrics overhead benchmark: cost of recording one request's metrics.
+
+Times the per-request recording path (one histogram observe plus one
+counter inc) from --threads threads, against the same path behind a
+single shared lock, and the cost of one scrape.
+
+Usage: python benchmarks/bench_metrics.py [--requests N] [--threads N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Registry  # noqa: E402
+
+ROUTES = ['/api/health', '/api/crypto/markets', '/api/crypto/<crypto_id>/chart', '/api/favorites']
+
+
+def run(threads, count, record):
+    def work():
+        for i in range(count):
+            record(ROUTES[i & 3], 0.004)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) / (threads * count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200_000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency', ('method', 'route'))
+    requests = registry.counter('requests_total', 'Requests', ('method', 'route', 'status'))
+
+    def sharded(route, seconds):
+        latency.observe(seconds, 'GET', route)
+        requests.inc('GET', route, '200')
+
+    # Baseline: the same metrics in one dict shared by every thread behind one lock
+    shared = Registry()
+    shared_values = {}
+    shared.shard = lambda: shared_values
+    shared_latency = shared.histogram('latency_seconds', 'Latency', ('method', 'route'))
+    shared_requests = shared.counter('requests_total', 'Requests', ('method', 'route', 'status'))
+    lock = threading.Lock()
+
+    def locked(route, seconds):
+        with lock:
+            shared_latency.observe(seconds, 'GET', route)
+            shared_requests.inc('GET', route, '200')
+
+    per_thread = args.requests // args.threads
+    sharded_us = run(args.threads, per_thread, sharded) * 1e6
+    locked_us = run(args.threads, per_thread, locked) * 1e6
+    started = time.perf_counter()
+    body = registry.render()
+    scrape_ms = (time.perf_counter() - started) * 1000
+
+    print(json.dumps({
+        'requests': per_thread * args.threads,
+        'threads': args.threads,
+        'record_us': round(sharded_us, 3),
+        'locked_record_us': round(locked_us, 3),
+        'scrape_ms': round(scrape_ms, 3),
+        'scrape_bytes': len(body),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
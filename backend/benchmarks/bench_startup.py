@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Startup time budget: import, create_app, schema setup and first request.
+
+Runs --runs fresh interpreters that each import app, build an app with
+create_app, create the schema in an in-memory SQLite database and serve
+GET /api/health, timing every phase (plus the process wall time). Then, in
+this process, times --apps warm create_app() + init_db() calls, i.e. the
+cost a test pays per setUp. Medians are checked against the budgets; any
+phase over budget is listed and makes the exit status 1.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--apps N] [--import-budget-ms MS] [--create-budget-ms MS]
+       [--first-request-budget-ms MS] [--per-app-budget-ms MS]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+TEST_CONFIG = {'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'JWT_SECRET_KEY': 'bench', 'LOG_LEVEL': 'ERROR'}
+
+# Runs in a fresh interpreter; prints the phase timings as JSON
+PROBE = f'''
+import json, time
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+app = app_module.create_app({TEST_CONFIG!r})
+created = time.perf_counter()
+app_module.init_db(app)
+schema = time.perf_counter()
+status = app.test_client().get('/api/health').status_code
+served = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'init_db_ms': (schema - created) * 1000,
+    'first_request_ms': (served - schema) * 1000,
+    'status': status,
+}}))
+'''
+
+
+def cold_start():
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=BACKEND, capture_output=True, text=True, check=True)
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    if phases.pop('status') != 200:
+        raise SystemExit(f'Health check failed during cold start:\n{result.stderr}')
+    phases['process_ms'] = (time.perf_counter() - started) * 1000
+    return phases
+
+
+def warm_apps(count):
+    from app import create_app, init_db
+
+    create_app(TEST_CONFIG)
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        init_db(create_app(TEST_CONFIG))
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--apps', type=int, default=50)
+    parser.add_argument('--import-budget-ms', type=float, default=1500)
+    parser.add_argument('--create-budget-ms', type=float, default=50)
+    parser.add_argument('--first-request-budget-ms', type=float, default=100)
+    parser.add_argument('--per-app-budget-ms', type=float, default=25)
+    args = parser.parse_args()
+
+    runs = [cold_start() for _ in range(args.runs)]
+    results = {
+        phase: round(statistics.median(run[phase] for run in runs), 2)
+        for phase in ('import_ms', 'create_app_ms', 'init_db_ms', 'first_request_ms', 'process_ms')
+    }
+    results['per_app_ms'] = round(warm_apps(args.apps), 2)
+
+    budgets = {
+        'import_ms': args.import_budget_ms,
+        'create_app_ms': args.create_budget_ms,
+        'first_request_ms': args.first_request_budget_ms,
+        'per_app_ms': args.per_app_budget_ms,
+    }
+    results['budgets'] = budgets
+    results['over_budget'] = [phase for phase, budget in budgets.items() if results[phase] > budget]
+    results['config'] = {'runs': args.runs, 'apps': args.apps}
+    print(json.dumps(results, indent=2))
+    if results['over_budget']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
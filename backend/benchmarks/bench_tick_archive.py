@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tick archive benchmark: bytes per tick on disk and range-read latency.
+
+Usage: python benchmarks/bench_tick_archive.py [--ticks N] [--reads N]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tick_archive import TickArchive  # noqa: E402
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ticks', type=int, default=1_000_000, help='ticks to archive (30s apart)')
+    parser.add_argument('--reads', type=int, default=2000, help='random range reads to time')
+    parser.add_argument('--span-hours', type=float, default=24 * 7, help='width of each range read')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='tick-archive-bench-')
+    try:
+        archive = TickArchive(root)
+        rng = np.random.default_rng(42)
+        ts = 1_600_000_000_000 + np.arange(args.ticks, dtype=np.int64) * 30_000
+        price = 30_000 + np.cumsum(rng.normal(0, 10, args.ticks))
+
+        started = time.perf_counter()
+        archive.extend('bitcoin', ts, price, price * 19e6, rng.uniform(1e9, 5e10, args.ticks))
+        write_seconds = time.perf_counter() - started
+
+        span = int(args.span_hours * 3_600_000)
+        starts = rng.integers(ts[0], max(ts[0] + 1, ts[-1] - span), args.reads)
+        latencies = []
+        rows = 0
+        for start in starts:
+            t0 = time.perf_counter()
+            data = archive.range('bitcoin', int(start), int(start) + span)
+            latencies.append((time.perf_counter() - t0) * 1e6)
+            rows += len(data['timestamps'])
+
+        disk = archive.disk_usage('bitcoin')
+        print(json.dumps({
+            'ticks': args.ticks,
+            'bytes_on_disk': disk,
+            'bytes_per_tick': round(disk / args.ticks, 3),
+            'json_bytes_per_tick': len(json.dumps([[int(ts[0]), float(price[0])], [int(ts[0]), float(price[0] * 19e6)], [int(ts[0]), 2.5e10]])),
+            'write_ticks_per_second': round(args.ticks / write_seconds),
+            'range_read_rows_avg': rows // max(1, args.reads),
+            'range_read_us': {
+                'p50': round(percentile(latencies, 50), 1),
+                'p95': round(percentile(latencies, 95), 1),
+                'p99': round(percentile(latencies, 99), 1),
+            },
+        }, indent=2))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
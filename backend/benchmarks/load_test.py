@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Load test of the backend against a local CoinGecko stand-in.
+
+Starts the stub upstream and the app (threaded WSGI server, temporary
+SQLite database and tick archive) in this process, then runs --workers
+clients for --duration seconds over a weighted mix of health, markets,
+chart, login and favorites read/write requests. Prints throughput,
+per-scenario p50/p95/p99 latency, errors and upstream call counts as JSON.
+
+Save a run with --save and compare a later run against it with --baseline;
+latency or throughput changes beyond --tolerance are listed as regressions
+and make the exit status 1.
+
+Usage: python benchmarks/load_test.py [--duration S] [--workers N] [--mix health=10,...]
+       [--latency-ms N] [--error-rate R] [--coins N] [--save FILE] [--baseline FILE]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_coingecko import StubCoinGecko  # noqa: E402
+
+SCENARIOS = ('health', 'markets', 'chart', 'login', 'favorites_read', 'favorites_write')
+DEFAULT_MIX = 'health=10,markets=30,chart=20,login=5,favorites_read=25,favorites_write=10'
+PASSWORD = 'load-test-password'
+
+
+def parse_mix(text):
+    weights = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        if name not in SCENARIOS:
+            raise SystemExit(f'Unknown scenario: {name}')
+        weights[name] = float(weight)
+    return weights
+
+
+def start_app(base_url, root):
+    """Build the app configured against the stub and serve it on a free port"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import create_app, init_db
+
+    app = create_app({
+        'COINGECKO_BASE_URL': base_url,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(root, 'load_test.db')}",
+        'TICK_ARCHIVE_DIR': os.path.join(root, 'ticks'),
+        'MARKET_POLLER_ENABLED': False,
+        'LOG_LEVEL': 'ERROR',
+    })
+    init_db(app)
+
+    class Handler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+class Client(threading.Thread):
+    """One simulated user running the request mix until the deadline"""
+
+    def __init__(self, index, target, weights, coins, seed):
+        super().__init__(daemon=True)
+        self.target = target
+        self.names = list(weights)
+        self.weights = list(weights.values())
+        self.coins = coins
+        self.random = random.Random(seed)
+        self.session = requests.Session()
+        self.email = f'load-{index}-{seed}@example.com'
+        self.token = None
+        self.favorites = set()
+        self.samples = []
+        self.deadline = None
+        self.recording = False
+
+    def setup(self):
+        self.session.post(f'{self.target}/api/auth/register', json={'email': self.email, 'password': PASSWORD})
+        self.login()
+
+    def login(self):
+        response = self.session.post(f'{self.target}/api/auth/login', json={'email': self.email, 'password': PASSWORD})
+        if response.status_code == 200:
+            self.token = response.json()['access_token']
+        return response
+
+    def request(self, scenario):
+        auth = {'Authorization': f'Bearer {self.token}'}
+        coin = f'coin-{self.random.randint(1, min(self.coins, 50))}'
+        if scenario == 'health':
+            return self.session.get(f'{self.target}/api/health')
+        if scenario == 'markets':
+            return self.session.get(f'{self.target}/api/crypto/markets', params={'per_page': 100})
+        if scenario == 'chart':
+            return self.session.get(f'{self.target}/api/crypto/{coin}/chart', params={'days': self.random.choice([1, 7, 30])})
+        if scenario == 'login':
+            return self.login()
+        if scenario == 'favorites_read':
+            return self.session.get(f'{self.target}/api/favorites', headers=auth)
+        if self.favorites and (coin in self.favorites or self.random.random() < 0.5):
+            removed = self.random.choice(sorted(self.favorites))
+            self.favorites.discard(removed)
+            return self.session.delete(f'{self.target}/api/favorites/{removed}', headers=auth)
+        self.favorites.add(coin)
+        return self.session.post(f'{self.target}/api/favorites', headers=auth, json={
+            'crypto_id': coin, 'crypto_name': coin, 'crypto_symbol': coin[:5]
+        })
+
+    def run(self):
+        while time.perf_counter() < self.deadline:
+            scenario = self.random.choices(self.names, self.weights)[0]
+            started = time.perf_counter()
+            try:
+                ok = self.request(scenario).status_code < 400
+            except requests.RequestException:
+                ok = False
+            if self.recording:
+                self.samples.append((scenario, time.perf_counter() - started, ok))
+
+
+def summarize(samples, seconds):
+    report = {}
+    for scenario in SCENARIOS:
+        latencies = np.array([s for name, s, _ in samples if name == scenario]) * 1000
+        if latencies.size == 0:
+            continue
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report[scenario] = {
+            'requests': int(latencies.size),
+            'errors': sum(1 for name, _, ok in samples if name == scenario and not ok),
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+        }
+    latencies = np.array([s for _, s, _ in samples]) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies.size else (0, 0, 0)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, _, ok in samples if not ok),
+        'seconds': round(seconds, 2),
+        'throughput_rps': round(len(samples) / seconds, 1),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'scenarios': report,
+    }
+
+
+def compare(baseline, current, tolerance):
+    """Relative change of each metric against the baseline; regressions exceed tolerance"""
+    changes = {}
+    regressions = []
+
+    def check(label, before, after, higher_is_better=False):
+        if not before:
+            return
+        change = (after - before) / before
+        changes[label] = {'baseline': before, 'current': after, 'change': round(change, 3)}
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(label)
+
+    check('throughput_rps', baseline['throughput_rps'], current['throughput_rps'], higher_is_better=True)
+    for scenario, stats in current['scenarios'].items():
+        before = baseline['scenarios'].get(scenario)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            check(f'{scenario}.{metric}', before[metric], stats[metric])
+    return {'tolerance': tolerance, 'changes': changes, 'regressions': regressions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--latency-ms', type=float, default=50, help='stub upstream latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='stub upstream 429 rate')
+    parser.add_argument('--coins', type=int, default=250, help='coins served by the stub')
+    parser.add_argument('--chart-scale', type=int, default=1, help='multiply stub chart points per day')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--baseline', help='compare against results saved with --save')
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+
+    stub = StubCoinGecko(latency_ms=args.latency_ms, error_rate=args.error_rate, coins=args.coins,
+                         chart_scale=args.chart_scale, seed=args.seed).start()
+    with tempfile.TemporaryDirectory() as root:
+        server, target = start_app(stub.base_url, root)
+        clients = [Client(i, target, weights, args.coins, args.seed + i) for i in range(args.workers)]
+        for client in clients:
+            client.setup()
+
+        deadline = time.perf_counter() + args.warmup + args.duration
+        for client in clients:
+            client.deadline = deadline
+            client.start()
+        time.sleep(args.warmup)
+        stub.reset()
+        started = time.perf_counter()
+        for client in clients:
+            client.recording = True
+        for client in clients:
+            client.join()
+        seconds = time.perf_counter() - started
+        upstream = stub.stats()
+        server.shutdown()
+    stub.stop()
+
+    results = summarize([sample for client in clients for sample in client.samples], seconds)
+    results['upstream_calls'] = upstream
+    results['config'] = {
+        'workers': args.workers, 'duration': args.duration, 'mix': weights, 'latency_ms': args.latency_ms,
+        'error_rate': args.error_rate, 'coins': args.coins, 'chart_scale': args.chart_scale, 'seed': args.seed,
+    }
+    if args.save:
+        with open(args.save, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            results['comparison'] = compare(json.load(fh), results, args.tolerance)
+    print(json.dumps(results, indent=2))
+    if args.baseline and results['comparison']['regressions']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the CoinGecko API routes the backend calls.
+
+Serves /coins/markets and /coins/{id}/market_chart with deterministic
+synthetic data, configurable latency, error rate and payload size, and
+counts calls per route. GET /__stats returns the counts, POST /__reset
+clears them.
+
+Usage: python benchmarks/stub_coingecko.py [--port N] [--latency-ms N] [--error-rate R] [--coins N] [--chart-scale N]
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HOUR = 3_600_000
+
+
+def market_coin(rank, now):
+    price = 50_000 / rank * (1 + 0.05 * math.sin(now / 600_000 + rank))
+    return {
+        'id': f'coin-{rank}',
+        'symbol': f'c{rank}',
+        'name': f'Coin {rank}',
+        'image': f'https://example.com/coins/{rank}.png',
+        'current_price': price,
+        'market_cap': price * 1e7,
+        'market_cap_rank': rank,
+        'total_volume': price * 1e5 * (1 + rank % 7),
+        'high_24h': price * 1.02,
+        'low_24h': price * 0.98,
+        'price_change_24h': price * 0.01,
+        'price_change_percentage_24h': 10 * math.sin(rank),
+        'circulating_supply': 1e7,
+        'total_supply': 2e7,
+        'max_supply': None,
+        'ath': price * 2,
+        'ath_date': '2021-11-10T14:24:11.849Z',
+        'atl': price / 100,
+        'atl_date': '2015-10-20T00:00:00.000Z',
+        'roi': None,
+        'last_updated': '2024-01-01T00:00:00.000Z',
+    }
+
+
+class StubCoinGecko:
+    """Threaded HTTP server; `base_url` is what COINGECKO_BASE_URL should point at"""
+
+    def __init__(self, port=0, latency_ms=0.0, error_rate=0.0, coins=250, chart_scale=1, seed=0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.coins = coins
+        self.chart_scale = chart_scale
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.calls)
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    def _fail(self):
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def markets(self, query):
+        per_page = min(int(query.get('per_page', 100)), 250)
+        page = max(int(query.get('page', 1)), 1)
+        now = time.time() * 1000
+        first = (page - 1) * per_page + 1
+        return [market_coin(rank, now) for rank in range(first, min(first + per_page, self.coins + 1))]
+
+    def market_chart(self, coin_id, query):
+        days = max(int(query.get('days', 7)), 1)
+        step = 86_400_000 if days > 30 else HOUR
+        points = days * 86_400_000 // step * self.chart_scale
+        step //= self.chart_scale
+        end = int(time.time() * 1000) // step * step
+        rank = int(coin_id.rsplit('-', 1)[-1]) if coin_id.rsplit('-', 1)[-1].isdigit() else 1
+        series = [[end - (points - i) * step, 50_000 / rank * (1 + 0.05 * math.sin(i / 24 + rank))] for i in range(points + 1)]
+        return {
+            'prices': series,
+            'market_caps': [[t, p * 1e7] for t, p in series],
+            'total_volumes': [[t, p * 1e5] for t, p in series],
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload, separators=(',', ':')).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if self.path == '/__reset':
+                    stub.reset()
+                    return self._send(200, {})
+                self._send(404, {'error': 'Not found'})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                parts = url.path.strip('/').split('/')
+                if url.path == '/__stats':
+                    return self._send(200, stub.stats())
+                if parts == ['coins', 'markets']:
+                    route = 'markets'
+                elif len(parts) == 3 and parts[0] == 'coins' and parts[2] == 'market_chart':
+                    route = 'market_chart'
+                else:
+                    return self._send(404, {'error': 'Not found'})
+
+                with stub._lock:
+                    stub.calls[route] += 1
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000)
+                if stub._fail():
+                    return self._send(429, {'status': {'error_code': 429, 'error_message': 'Rate limited'}})
+                if route == 'markets':
+                    return self._send(200, stub.markets(query))
+                self._send(200, stub.market_chart(parts[1], query))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--coins', type=int, default=250)
+    parser.add_argument('--chart-scale', type=int, default=1, help='multiply chart points per day')
+    args = parser.parse_args()
+
+    stub = StubCoinGecko(args.port, args.latency_ms, args.error_rate, args.coins, args.chart_scale)
+    print(f'Stub CoinGecko at {stub.base_url} (set COINGECKO_BASE_URL to this)')
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
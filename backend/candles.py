@@ -0,0 +1,187 @@
+"""
+Incremental OHLCV candle rollups built from market snapshot ticks.
+
+Each tick only touches the open 1m bar. When a bar closes it is folded into
+the open bar of the next coarser resolution, so 5m bars are built from 1m
+bars, 1h from 5m and 1d from 1h - raw ticks are never rescanned.
+"""
+
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Resolution name -> bucket width in milliseconds, finest first
+RESOLUTIONS = {
+    '1m': 60_000,
+    '5m': 300_000,
+    '1h': 3_600_000,
+    '1d': 86_400_000,
+}
+
+# Closed bars kept per resolution (None keeps everything)
+DEFAULT_RETENTION = {
+    '1m': 7 * 24 * 60,
+    '5m': 30 * 24 * 12,
+    '1h': 365 * 24,
+    '1d': None,
+}
+
+# Columns of a candle row as returned by CandleEngine.candles()
+COLUMNS = ['t', 'o', 'h', 'l', 'c', 'v']
+
+_LEVELS = list(RESOLUTIONS)
+
+
+def _merge(bar, other):
+    """Fold a later bar into an earlier one (same bucket) in place"""
+    if other[2] > bar[2]:
+        bar[2] = other[2]
+    if other[3] < bar[3]:
+        bar[3] = other[3]
+    bar[4] = other[4]
+    bar[5] = other[5]
+    return bar
+
+
+class CandleSeries:
+    """Closed bars for one coin at one resolution, stored column-wise"""
+
+    def __init__(self, width, retention=None):
+        self.width = width
+        self.retention = retention
+        self.times = array('q')
+        self.opens = array('d')
+        self.highs = array('d')
+        self.lows = array('d')
+        self.closes = array('d')
+        self.volumes = array('d')
+        self.open_bar = None
+
+    def __len__(self):
+        return len(self.times)
+
+    def bucket(self, ts):
+        return ts - ts % self.width
+
+    def append(self, bar):
+        self.times.append(bar[0])
+        self.opens.append(bar[1])
+        self.highs.append(bar[2])
+        self.lows.append(bar[3])
+        self.closes.append(bar[4])
+        self.volumes.append(bar[5])
+        # Trim in batches so the front deletion cost is amortized
+        if self.retention and len(self.times) > self.retention * 5 // 4:
+            excess = len(self.times) - self.retention
+            for column in self._columns():
+                del column[:excess]
+
+    def slice(self, start, end):
+        """Closed bars whose bucket start is within [start, end]"""
+        lo = 0 if start is None else bisect_left(self.times, start)
+        hi = len(self.times) if end is None else bisect_right(self.times, end)
+        return [list(row) for row in zip(*(column[lo:hi] for column in self._columns()))]
+
+    def _columns(self):
+        return (self.times, self.opens, self.highs, self.lows, self.closes, self.volumes)
+
+
+class CandleEngine:
+    """Maintains 1m/5m/1h/1d candles for every coin seen in the tick stream.
+
+    The `v` column carries the 24h rolling volume reported at the bar's last
+    tick, since that is the only volume figure the markets feed provides.
+    """
+
+    def __init__(self, retention=None):
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self._series = {}
+        self._lock = threading.RLock()
+
+    def ingest(self, coin_id, ts, price, volume=None):
+        """Apply one price tick; ticks older than the open 1m bar are dropped"""
+        if price is None:
+            return False
+        volume = float(volume) if volume is not None else 0.0
+        price = float(price)
+        with self._lock:
+            levels = self._series.get(coin_id)
+            if levels is None:
+                levels = self._series[coin_id] = [
+                    CandleSeries(RESOLUTIONS[name], self.retention.get(name)) for name in _LEVELS
+                ]
+            finest = levels[0]
+            start = finest.bucket(ts)
+            current = finest.open_bar
+            if current is not None:
+                if start < current[0]:
+                    return False
+                if start == current[0]:
+                    _merge(current, [start, price, price, price, price, volume])
+                    return True
+                self._close(levels, 0)
+            finest.open_bar = [start, price, price, price, price, volume]
+            return True
+
+    def ingest_snapshot(self, coins, ts):
+        """Feed a /coins/markets payload as one tick per coin"""
+        for coin in coins:
+            coin_id = coin.get('id')
+            if coin_id:
+                self.ingest(coin_id, ts, coin.get('current_price'), coin.get('total_volume'))
+
+    def coins(self):
+        with self._lock:
+            return list(self._series)
+
+    def has(self, coin_id):
+        with self._lock:
+            return coin_id in self._series
+
+    def candles(self, coin_id, resolution, start=None, end=None, include_open=True):
+        """Return [t, o, h, l, c, v] rows for bars starting within [start, end]"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f'Unsupported resolution: {resolution}')
+        level = _LEVELS.index(resolution)
+        with self._lock:
+            levels = self._series.get(coin_id)
+            if levels is None:
+                return None
+            rows = levels[level].slice(start, end)
+            if include_open:
+                rows.extend(
+                    bar for bar in self._pending(levels, level)
+                    if (start is None or bar[0] >= start) and (end is None or bar[0] <= end)
+                )
+            return rows
+
+    def _close(self, levels, level):
+        """Close the open bar at `level` and fold it into the next coarser level"""
+        series = levels[level]
+        bar = series.open_bar
+        series.open_bar = None
+        series.append(bar)
+        if level + 1 >= len(levels):
+            return
+        parent = levels[level + 1]
+        start = parent.bucket(bar[0])
+        if parent.open_bar is not None and parent.open_bar[0] != start:
+            self._close(levels, level + 1)
+        if parent.open_bar is None:
+            parent.open_bar = [start] + bar[1:]
+        else:
+            _merge(parent.open_bar, bar)
+
+    def _pending(self, levels, level):
+        """Bars at `level` not yet closed, including ticks still in finer open bars"""
+        series = levels[level]
+        bars = [list(series.open_bar)] if series.open_bar is not None else []
+        if level == 0:
+            return bars
+        for finer in self._pending(levels, level - 1):
+            start = series.bucket(finer[0])
+            if bars and bars[-1][0] == start:
+                _merge(bars[-1], finer)
+            else:
+                bars.append([start] + finer[1:])
+        return bars
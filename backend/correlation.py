@@ -0,0 +1,154 @@
+"""
+Cross-asset log-return correlation over aligned price series.
+
+Series are aligned on a fixed time grid (last price per bucket, forward
+filled), turned into a (T x N) log-return matrix, and reduced to running
+column sums plus the N x N cross-product. New bars only add their outer
+products and expired bars subtract theirs, so refreshing a cached matrix
+costs O(new_bars * N^2) instead of a full recompute. Results built from
+a missing series or fewer than two returns are never cached.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SeriesUnavailable(Exception):
+    """Raised by a series loader when a coin's prices could not be fetched"""
+
+    def __init__(self, coin_id, status):
+        super().__init__(f'No price series for {coin_id} (status {status})')
+        self.coin_id = coin_id
+        self.status = status
+
+
+def align(series, start, end, interval):
+    """Resample [(timestamps, prices), ...] onto a shared grid of `interval` buckets.
+
+    Returns (grid, prices) with prices shaped (T, N); the grid starts at the
+    first bucket where every series has a value.
+    """
+    first = start - start % interval
+    grid = np.arange(first, end + 1, interval, dtype=np.int64)
+    prices = np.full((grid.size, len(series)), np.nan)
+    for column, (timestamps, values) in enumerate(series):
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if timestamps.size == 0:
+            continue
+        # Index of the last observation at or before each bucket end
+        idx = np.searchsorted(timestamps, grid + interval - 1, side='right') - 1
+        valid = idx >= 0
+        prices[valid, column] = values[idx[valid]]
+    complete = np.flatnonzero(~np.isnan(prices).any(axis=1))
+    if complete.size == 0:
+        return grid[:0], prices[:0]
+    return grid[complete[0]:], prices[complete[0]:]
+
+
+def log_returns(prices):
+    """(T, N) prices -> (T - 1, N) log returns; non-positive prices give NaN"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.log(np.where(prices > 0, prices, np.nan))
+    return np.diff(logs, axis=0)
+
+
+class RollingCorrelation:
+    """Correlation of the last `window` return rows, maintained from sufficient statistics"""
+
+    # Full recompute after this many incremental updates to shed float drift
+    RECOMPUTE_EVERY = 1024
+
+    def __init__(self, returns, window=None):
+        self.window = window
+        self.returns = np.empty((0, returns.shape[1]))
+        self.sums = np.zeros(returns.shape[1])
+        self.cross = np.zeros((returns.shape[1], returns.shape[1]))
+        self._updates = 0
+        self.append(returns)
+
+    @property
+    def observations(self):
+        return self.returns.shape[0]
+
+    def append(self, rows):
+        rows = np.nan_to_num(np.asarray(rows, dtype=np.float64), nan=0.0)
+        if rows.size == 0:
+            return
+        self.returns = np.concatenate([self.returns, rows])
+        self.sums += rows.sum(axis=0)
+        self.cross += rows.T @ rows
+        if self.window is not None and self.observations > self.window:
+            expired = self.returns[:-self.window]
+            self.returns = self.returns[-self.window:]
+            self.sums -= expired.sum(axis=0)
+            self.cross -= expired.T @ expired
+        self._updates += 1
+        if self._updates % self.RECOMPUTE_EVERY == 0:
+            self.sums = self.returns.sum(axis=0)
+            self.cross = self.returns.T @ self.returns
+
+    def matrix(self):
+        """N x N Pearson correlation; NaN where a series has zero variance"""
+        n = self.observations
+        if n < 2:
+            return np.full(self.cross.shape, np.nan)
+        mean = self.sums / n
+        cov = self.cross / n - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        corr[std == 0, :] = np.nan
+        corr[:, std == 0] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+
+class CorrelationCache:
+    """Caches a RollingCorrelation per (id set, window) and extends it with newer bars"""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ids, days, interval, load, now):
+        """Return (ids, observations, matrix) for `ids` over the last `days`.
+
+        `load(coin_id, start, end)` returns (timestamps, prices) for one coin
+        and may raise SeriesUnavailable, which propagates. Only completed
+        buckets are used, so cached bars never change later.
+        """
+        key = (tuple(sorted(set(ids))), days)
+        ids = list(key[0])
+        end = now - now % interval - interval
+        start = end - days * 86_400_000
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['last'] >= end:
+                self._entries.move_to_end(key)
+                return ids, entry['rolling'].observations, entry['rolling'].matrix()
+
+        series = [load(coin_id, start - interval, end + interval - 1) for coin_id in ids]
+        grid, prices = align(series, start - interval, end, interval)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and grid.size and grid[0] <= entry['last'] < grid[-1]:
+                # Only bars after the cached one are new; their returns chain from it
+                rolling = entry['rolling']
+                tail = int(np.searchsorted(grid, entry['last']))
+                rolling.append(log_returns(prices[tail:]))
+            elif entry is not None and grid.size and entry['last'] >= grid[-1]:
+                rolling = entry['rolling']
+            else:
+                rolling = RollingCorrelation(log_returns(prices), days * 86_400_000 // interval)
+                # An empty series or too short an overlap would otherwise be served as NaN until the next bar
+                if any(len(timestamps) == 0 for timestamps, _ in series) or rolling.observations < 2:
+                    return ids, rolling.observations, rolling.matrix()
+            self._entries[key] = {'rolling': rolling, 'last': int(grid[-1]) if grid.size else end}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return ids, rolling.observations, rolling.matrix()
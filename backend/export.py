@@ -0,0 +1,64 @@
+"""
+Streaming price history export.
+
+Rows are read from the tick archive in fixed-size batches and formatted one
+batch at a time, so an export holds at most one batch in memory however
+large the requested range is. Output can be gzipped on the fly.
+"""
+
+import json
+import zlib
+
+import numpy as np
+
+# format -> mimetype
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+CSV_HEADER = 'id,timestamp,price,market_cap,volume\n'
+BATCH_ROWS = 4096
+
+
+def _text(column, missing):
+    """repr() of each value, with `missing` in place of NaN"""
+    values = column.tolist()
+    if not np.isnan(column).any():
+        return map(repr, values)
+    return (missing if value != value else repr(value) for value in values)
+
+
+def _format_batch(coin_id, data, fmt):
+    missing = '' if fmt == 'csv' else 'null'
+    rows = zip(
+        data['timestamps'].tolist(),
+        *(_text(data[key], missing) for key in ('price', 'market_cap', 'volume'))
+    )
+    if fmt == 'csv':
+        return ''.join(f'{coin_id},{ts},{price},{cap},{volume}\n' for ts, price, cap, volume in rows)
+    quoted = json.dumps(coin_id)
+    return ''.join(
+        f'{{"id":{quoted},"timestamp":{ts},"price":{price},"market_cap":{cap},"volume":{volume}}}\n'
+        for ts, price, cap, volume in rows
+    )
+
+
+def export_rows(archive, ids, start, end, fmt, batch_rows=BATCH_ROWS):
+    """Yield encoded chunks of `ids`' ticks between start and end, one coin after another"""
+    if fmt not in FORMATS:
+        raise ValueError(f'Invalid format: {fmt}')
+    if fmt == 'csv':
+        yield CSV_HEADER.encode()
+    for coin_id in ids:
+        for data in archive.iter_range(coin_id, start, end, batch_rows):
+            yield _format_batch(coin_id, data, fmt).encode()
+
+
+def gzip_stream(chunks, level=6):
+    """Compress a byte stream into a gzip stream incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,82 @@
+"""
+Global market aggregates computed once per market snapshot.
+
+Total market cap, 24h volume and market cap change, BTC/ETH dominance and
+breadth (advancing/declining/unchanged coins) are vectorized column sums
+over the full universe on each rebuild. Each rebuild also appends one
+encoded point to a fixed-size ring buffer of intraday history and
+pre-serializes the responses, so serving /api/crypto/global is a byte copy
+and the history is never re-encoded.
+"""
+
+import json
+from collections import deque
+
+import numpy as np
+
+# History columns, in ring buffer order
+HISTORY_COLUMNS = (
+    'ts', 'total_market_cap', 'total_volume', 'btc_dominance', 'eth_dominance', 'advancing', 'declining',
+)
+HISTORY_COLUMNS_JSON = json.dumps(HISTORY_COLUMNS, separators=(',', ':')).encode()
+DOMINANCE_IDS = {'btc_dominance': 'bitcoin', 'eth_dominance': 'ethereum'}
+
+
+def aggregate(snapshot):
+    """(total market cap, total volume, 24h market cap change) and breadth (declining, unchanged, advancing)"""
+    figures = np.stack([snapshot.column(field) for field in ('market_cap', 'total_volume', 'market_cap_change_24h')])
+    totals = np.nansum(figures, axis=1)
+    # NaN compares false both ways, so a coin without a 24h change counts as unchanged
+    change = snapshot.column('price_change_percentage_24h')
+    advancing = int(np.count_nonzero(change > 0))
+    declining = int(np.count_nonzero(change < 0))
+    return totals.tolist(), (declining, len(snapshot) - advancing - declining, advancing)
+
+
+class GlobalMarket:
+    """Latest aggregates and their history; subscribe `update` to MarketUniverse rebuilds"""
+
+    def __init__(self, history_points=2880):
+        # Encoded history points, oldest first; a full ring drops its oldest point on append
+        self.history = deque(maxlen=history_points)
+        self._bodies = None
+
+    def update(self, previous, current):
+        if not len(current):
+            return
+        (total_cap, total_volume, cap_change), (declining, unchanged, advancing) = aggregate(current)
+        market_caps = current.column('market_cap')
+        dominance = {}
+        for name, coin_id in DOMINANCE_IDS.items():
+            row = current.index.get(coin_id)
+            cap = 0.0 if row is None or market_caps[row] != market_caps[row] else float(market_caps[row])
+            dominance[name] = cap / total_cap * 100 if total_cap else None
+        summary = {
+            'updated_at': current.ts,
+            'coins': len(current),
+            'total_market_cap': total_cap,
+            'total_volume': total_volume,
+            'market_cap_change_24h': cap_change,
+            'market_cap_change_percentage_24h': cap_change / (total_cap - cap_change) * 100 if total_cap != cap_change else None,
+            'btc_dominance': dominance['btc_dominance'],
+            'eth_dominance': dominance['eth_dominance'],
+            'breadth': {'advancing': advancing, 'declining': declining, 'unchanged': unchanged},
+        }
+        if current.ts is not None:
+            self.history.append(json.dumps([
+                current.ts, total_cap, total_volume, dominance['btc_dominance'], dominance['eth_dominance'],
+                advancing, declining,
+            ], separators=(',', ':')).encode())
+        body = json.dumps(summary, separators=(',', ':')).encode()
+        history_body = b''.join((
+            body[:-1], b',"history":{"columns":', HISTORY_COLUMNS_JSON, b',"points":[', b','.join(self.history), b']}}',
+        ))
+        # One reference swap publishes both bodies
+        self._bodies = (body, history_body)
+
+    def body(self, history=False):
+        """Serialized aggregates (with the history ring if asked), or None before the first snapshot"""
+        bodies = self._bodies
+        if bodies is None:
+            return None
+        return bodies[1] if history else bodies[0]
@@ -0,0 +1,74 @@
+"""
+Background poller that fetches the CoinGecko market snapshot and fans it out.
+
+Subscribers are plain callables taking (coins, ts) where `coins` is the
+/coins/markets payload and `ts` the snapshot time in epoch milliseconds.
+Route handlers that already fetched a snapshot can publish it as well, so
+subscribers keep receiving ticks when the background thread is disabled.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+class MarketPoller:
+    """Polls `fetch()` every `interval` seconds and publishes each snapshot"""
+
+    def __init__(self, fetch, interval=30.0):
+        self.fetch = fetch
+        self.interval = interval
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        return callback
+
+    def publish(self, coins, ts=None):
+        """Hand a snapshot to every subscriber; one failing subscriber does not stop the rest"""
+        ts = now_ms() if ts is None else ts
+        for callback in list(self._subscribers):
+            try:
+                callback(coins, ts)
+            except Exception:
+                logger.exception('Market snapshot subscriber %r failed', callback)
+
+    def poll_once(self):
+        coins = self.fetch()
+        if coins:
+            self.publish(coins)
+        return coins
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='market-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception('Market poll failed')
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
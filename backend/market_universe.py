@@ -0,0 +1,159 @@
+"""
+Struct-of-arrays view of the CoinGecko market universe.
+
+Each /coins/markets payload is rebuilt in bulk into a MarketSnapshot: one
+float64 NumPy column per numeric field, interned id/symbol tables and an
+id -> row index. Snapshots are immutable once built and swapped in with a
+single reference assignment, so readers never see a half-built universe.
+"""
+
+import sys
+import threading
+
+import numpy as np
+
+NUMERIC_FIELDS = (
+    'current_price',
+    'market_cap',
+    'market_cap_rank',
+    'fully_diluted_valuation',
+    'total_volume',
+    'high_24h',
+    'low_24h',
+    'price_change_24h',
+    'price_change_percentage_24h',
+    'market_cap_change_24h',
+    'market_cap_change_percentage_24h',
+    'circulating_supply',
+    'total_supply',
+    'max_supply',
+    'ath',
+    'ath_change_percentage',
+    'atl',
+    'atl_change_percentage',
+    'price_change_percentage_24h_in_currency',
+)
+# Non-numeric payload fields, kept as plain per-row lists
+TEXT_FIELDS = ('name', 'image', 'ath_date', 'atl_date', 'roi', 'last_updated')
+# Payload keys returned by project(), in upstream order
+FIELDS = (
+    'id', 'symbol', 'name', 'image',
+    'current_price', 'market_cap', 'market_cap_rank', 'fully_diluted_valuation', 'total_volume',
+    'high_24h', 'low_24h', 'price_change_24h', 'price_change_percentage_24h',
+    'market_cap_change_24h', 'market_cap_change_percentage_24h',
+    'circulating_supply', 'total_supply', 'max_supply',
+    'ath', 'ath_change_percentage', 'ath_date', 'atl', 'atl_change_percentage', 'atl_date',
+    'roi', 'last_updated', 'price_change_percentage_24h_in_currency',
+)
+
+
+class MarketSnapshot:
+    """One immutable market universe; rows are in upstream order"""
+
+    def __init__(self, coins, ts=None, version=0):
+        self.ts = ts
+        self.version = version
+        self.ids = [sys.intern(str(coin['id'])) for coin in coins]
+        self.symbols = [sys.intern(str(coin.get('symbol') or '')) for coin in coins]
+        self.index = {coin_id: row for row, coin_id in enumerate(self.ids)}
+        # One pass over the payload into a (fields x rows) block; None becomes NaN
+        block = np.array(
+            [[coin.get(field) for field in NUMERIC_FIELDS] for coin in coins],
+            dtype=np.float64
+        ).reshape(len(coins), len(NUMERIC_FIELDS)).T.copy()
+        self.columns = dict(zip(NUMERIC_FIELDS, block))
+        self.text = {field: [coin.get(field) for coin in coins] for field in TEXT_FIELDS}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column(self, field):
+        return self.columns[field]
+
+    def rows(self, ids):
+        """Row index for each id, -1 where the coin is not in the universe"""
+        get = self.index.get
+        return np.fromiter((get(coin_id, -1) for coin_id in ids), dtype=np.intp, count=len(ids))
+
+    def lookup(self, ids, field):
+        """Join `ids` against one numeric column; None where missing"""
+        rows = self.rows(ids)
+        if len(self) == 0:
+            return [None] * len(rows)
+        values = np.where(rows >= 0, self.columns[field][rows], np.nan)
+        return [None if v != v else v for v in values.tolist()]
+
+    def order(self, field, descending=True, limit=None, rows=None):
+        """Row indices sorted by `field`; NaN sorts last, top-k uses argpartition"""
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.intp)
+        values = self.columns[field][rows]
+        keys = np.where(np.isnan(values), np.inf, -values if descending else values)
+        if limit is not None and limit < len(rows):
+            top = np.argpartition(keys, limit)[:limit]
+            return rows[top[np.argsort(keys[top], kind='stable')]]
+        return rows[np.argsort(keys, kind='stable')]
+
+    def where(self, field, minimum=None, maximum=None, rows=None):
+        """Rows whose `field` lies within [minimum, maximum], optionally restricted to `rows`"""
+        values = self.columns[field]
+        mask = ~np.isnan(values)
+        if minimum is not None:
+            mask &= values >= minimum
+        if maximum is not None:
+            mask &= values <= maximum
+        selected = np.flatnonzero(mask)
+        return selected if rows is None else np.intersect1d(rows, selected)
+
+    def project(self, rows, fields=None):
+        """Materialize payload dicts for `rows`, keeping only `fields` if given"""
+        rows = np.asarray(rows, dtype=np.intp)
+        fields = FIELDS if fields is None else [field for field in fields if field in FIELDS]
+        row_list = rows.tolist()
+        values = {}
+        for field in fields:
+            if field in self.columns:
+                column = self.columns[field][rows]
+                values[field] = [None if v != v else v for v in column.tolist()]
+            elif field == 'id':
+                values[field] = [self.ids[row] for row in row_list]
+            elif field == 'symbol':
+                values[field] = [self.symbols[row] for row in row_list]
+            else:
+                values[field] = [self.text[field][row] for row in row_list]
+        return [dict(zip(fields, items)) for items in zip(*(values[field] for field in fields))]
+
+
+class MarketUniverse:
+    """Holds the latest MarketSnapshot and rebuilds it from each payload"""
+
+    def __init__(self):
+        self.snapshot = MarketSnapshot([])
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._notified = self.snapshot
+        self._notify_lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Call `callback(previous, current)` after every rebuild, in version order"""
+        self._listeners.append(callback)
+        return callback
+
+    def rebuild(self, coins, ts=None):
+        coins = [coin for coin in coins if coin.get('id')]
+        with self._lock:
+            current = MarketSnapshot(coins, ts, self.snapshot.version + 1)
+            self.snapshot = current
+        # Concurrent rebuilds can reach here out of order; a snapshot older than the
+        # last one dispatched is dropped so listeners never roll back
+        with self._notify_lock:
+            previous = self._notified
+            if current.version <= previous.version:
+                return current
+            self._notified = current
+            for callback in list(self._listeners):
+                callback(previous, current)
+        return current
+
+    def is_fresh(self, now, max_age):
+        snapshot = self.snapshot
+        return len(snapshot) > 0 and snapshot.ts is not None and now - snapshot.ts <= max_age
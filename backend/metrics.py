@@ -0,0 +1,182 @@
+"""
+Minimal Prometheus metrics with per-thread shards.
+
+Every thread records into its own dict, so counting and observing never
+take a lock - just a thread-local lookup and a dict update under the GIL.
+A scrape sums the shards; shards of threads that have exited are folded
+into a retired total, on scrape and whenever a new thread registers, so
+short-lived request threads don't accumulate between scrapes.
+"""
+
+import threading
+from bisect import bisect_left
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _merge(into, values):
+    for key, value in values.items():
+        if isinstance(value, list):
+            current = into.get(key)
+            into[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value != value:
+        return 'NaN'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames, callback):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self, totals):
+        """(suffix, label values, extra label, value) tuples for the exposition"""
+        if self.callback is not None:
+            values = self.callback()
+            if not isinstance(values, dict):
+                values = {(): values}
+            return [('', labels, None, value) for labels, value in values.items()]
+        return [('', key[1], None, value) for key, value in totals.items() if key[0] == self.name]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        values = self.registry.shard()
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    """Summed across threads, so inc/dec from different threads balance out"""
+    kind = 'gauge'
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames, None)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        values = self.registry.shard()
+        key = (self.name, labels)
+        counts = values.get(key)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            counts = values[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self, totals):
+        samples = []
+        for key, counts in totals.items():
+            if key[0] != self.name:
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts[:-1]):
+                cumulative += count
+                samples.append(('_bucket', key[1], f'le="{bound}"', cumulative))
+            samples.append(('_sum', key[1], None, counts[-1]))
+            samples.append(('_count', key[1], None, cumulative))
+        return samples
+
+
+class Registry:
+    """Named metrics plus the per-thread shards they record into"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=(), callback=None):
+        return self._register(Counter(self, name, documentation, labelnames, callback))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        """`callback()` returning a value or {label values: value} is read at scrape time"""
+        return self._register(Gauge(self, name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f'Duplicate metric: {metric.name}')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def shard(self):
+        """This thread's values dict, created on first use"""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._fold_exited()
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def _fold_exited(self):
+        # Caller holds _lock; an exited thread no longer writes to its shard
+        live = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                live.append((thread, values))
+            else:
+                _merge(self._retired, values)
+        self._shards = live
+
+    def collect(self):
+        """Sum of every shard keyed by (metric name, label values)"""
+        with self._lock:
+            self._fold_exited()
+            totals = {}
+            _merge(totals, self._retired)
+            for _, values in self._shards:
+                # dict() copies atomically under the GIL while the owner keeps writing
+                _merge(totals, dict(values))
+        return totals
+
+    def render(self):
+        """Prometheus text exposition of every metric"""
+        totals = self.collect()
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for suffix, labels, extra, value in metric.samples(totals):
+                lines.append(f'{metric.name}{suffix}{_labels(metric.labelnames, labels, extra)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,78 @@
+"""
+Top movers leaderboards maintained once per market snapshot.
+
+Every rebuild of the market universe ranks the full snapshot with a partial
+sort (argpartition) for each leaderboard and pre-serializes the responses,
+so serving /api/crypto/movers is a dictionary lookup and a byte copy.
+"""
+
+import json
+
+import numpy as np
+
+# kind -> (column, descending)
+KINDS = {
+    'gainers': ('price_change_percentage_24h', True),
+    'losers': ('price_change_percentage_24h', False),
+    'volume': ('total_volume', True),
+}
+MOVER_FIELDS = (
+    'id', 'symbol', 'name', 'image', 'market_cap_rank',
+    'current_price', 'price_change_percentage_24h', 'total_volume',
+)
+# Limits serialized eagerly on each snapshot; others are serialized on first use
+DEFAULT_LIMITS = (5, 10, 25, 50, 100)
+
+
+class _Rankings:
+    """Leaderboards for one snapshot; immutable apart from the lazy body memo"""
+
+    def __init__(self, snapshot, depth, limits):
+        self.version = snapshot.version
+        self.updated_at = snapshot.ts
+        self.entries = {}
+        for kind, (field, descending) in KINDS.items():
+            rows = snapshot.order(field, descending=descending, limit=depth)
+            # Coins without the ranked figure don't belong on the board
+            rows = rows[~np.isnan(snapshot.column(field)[rows])]
+            self.entries[kind] = snapshot.project(rows, MOVER_FIELDS)
+        self.bodies = {}
+        for kind in KINDS:
+            for limit in limits:
+                self.body(kind, limit)
+
+    def body(self, kind, limit):
+        key = (kind, limit)
+        body = self.bodies.get(key)
+        if body is None:
+            body = self.bodies[key] = json.dumps({
+                'kind': kind,
+                'limit': limit,
+                'updated_at': self.updated_at,
+                'coins': self.entries[kind][:limit],
+            }, separators=(',', ':')).encode()
+        return body
+
+
+class MoversBoard:
+    """Keeps the latest rankings; subscribe `update` to MarketUniverse rebuilds"""
+
+    def __init__(self, depth=100, limits=DEFAULT_LIMITS):
+        self.depth = depth
+        self.limits = tuple(limit for limit in limits if limit <= depth)
+        self._rankings = None
+
+    def update(self, previous, current):
+        if len(current):
+            self._rankings = _Rankings(current, self.depth, self.limits)
+
+    def body(self, kind, limit):
+        """Serialized ranking, or None before the first snapshot"""
+        if kind not in KINDS:
+            raise ValueError(f'Invalid kind: {kind}')
+        if not 1 <= limit <= self.depth:
+            raise ValueError(f'limit must be between 1 and {self.depth}')
+        rankings = self._rankings
+        if rankings is None:
+            return None
+        return rankings.body(kind, limit)
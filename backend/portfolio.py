@@ -0,0 +1,111 @@
+"""
+Vectorized portfolio valuation against the array-backed market snapshot.
+
+Holdings are gathered into flat arrays (owner index, coin id, quantity,
+cost basis), joined to the snapshot's price column through its id -> row
+index and reduced per owner with np.bincount, so valuing one user or every
+user is the same single pass.
+"""
+
+import numpy as np
+
+from correlation import align
+
+
+class Valuation:
+    """Per-holding and per-owner figures for one valuation pass"""
+
+    def __init__(self, owners, crypto_ids, quantities, cost_basis, snapshot):
+        self.owners = np.asarray(owners, dtype=np.int64)
+        self.crypto_ids = list(crypto_ids)
+        self.quantities = np.asarray(quantities, dtype=np.float64)
+        self.cost_basis = np.nan_to_num(np.asarray(cost_basis, dtype=np.float64))
+
+        rows = snapshot.rows(self.crypto_ids)
+        found = rows >= 0
+        self.prices = np.full(len(rows), np.nan)
+        if found.any():
+            self.prices[found] = snapshot.column('current_price')[rows[found]]
+        self.values = self.quantities * self.prices
+        self.pnl = self.values - self.cost_basis
+
+        # Owners are grouped on a dense index so the reductions are bincounts
+        self.owner_ids, self.owner_index = np.unique(self.owners, return_inverse=True)
+        size = len(self.owner_ids)
+        priced = ~np.isnan(self.values)
+        self.totals = np.bincount(self.owner_index, weights=np.where(priced, self.values, 0.0), minlength=size)
+        self.total_cost = np.bincount(self.owner_index, weights=self.cost_basis, minlength=size)
+        self.priced_cost = np.bincount(self.owner_index, weights=np.where(priced, self.cost_basis, 0.0), minlength=size)
+        self.counts = np.bincount(self.owner_index, minlength=size)
+        self.unpriced = self.counts - np.bincount(self.owner_index, weights=priced, minlength=size).astype(np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.allocation = self.values / self.totals[self.owner_index]
+
+    def owner_summary(self, position):
+        total = float(self.totals[position])
+        pnl = total - float(self.priced_cost[position])
+        return {
+            'total_value': total,
+            'total_cost_basis': float(self.total_cost[position]),
+            'unrealized_pnl': pnl,
+            'unrealized_pnl_percentage': pnl / float(self.priced_cost[position]) * 100 if self.priced_cost[position] else None,
+            'unpriced_holdings': int(self.unpriced[position]),
+        }
+
+    def holdings(self, owner):
+        """Per-holding rows for one owner, largest position first"""
+        position = np.searchsorted(self.owner_ids, owner)
+        if position >= len(self.owner_ids) or self.owner_ids[position] != owner:
+            return []
+        members = np.flatnonzero(self.owner_index == position)
+        members = members[np.argsort(-np.nan_to_num(self.values[members], nan=-np.inf), kind='stable')]
+        return [{
+            'crypto_id': self.crypto_ids[i],
+            'quantity': float(self.quantities[i]),
+            'cost_basis': float(self.cost_basis[i]),
+            'price': _number(self.prices[i]),
+            'value': _number(self.values[i]),
+            'unrealized_pnl': _number(self.pnl[i]),
+            'allocation': _number(self.allocation[i]),
+        } for i in members.tolist()]
+
+    def summary(self, owner):
+        position = np.searchsorted(self.owner_ids, owner)
+        if position >= len(self.owner_ids) or self.owner_ids[position] != owner:
+            return {'total_value': 0.0, 'total_cost_basis': 0.0, 'unrealized_pnl': 0.0,
+                    'unrealized_pnl_percentage': None, 'unpriced_holdings': 0}
+        return self.owner_summary(position)
+
+    def report(self):
+        """Per-owner summaries for every owner, by total value descending"""
+        order = np.argsort(-self.totals, kind='stable')
+        totals = self.totals[order]
+        priced_cost = self.priced_cost[order]
+        pnl = totals - priced_cost
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentage = np.where(priced_cost != 0, pnl / priced_cost * 100, np.nan)
+        keys = ('user_id', 'holdings', 'total_value', 'total_cost_basis', 'unrealized_pnl',
+                'unrealized_pnl_percentage', 'unpriced_holdings')
+        columns = (
+            self.owner_ids[order].tolist(),
+            self.counts[order].tolist(),
+            totals.tolist(),
+            self.total_cost[order].tolist(),
+            pnl.tolist(),
+            [_number(value) for value in percentage.tolist()],
+            self.unpriced[order].tolist(),
+        )
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+def value_history(series, quantities, start, end, interval):
+    """Portfolio value on an `interval` grid from per-coin (timestamps, prices) series.
+
+    Returns (grid, values); the grid starts once every series has a price.
+    """
+    grid, prices = align(series, start, end, interval)
+    return grid, prices @ np.asarray(quantities, dtype=np.float64)
+
+
+def _number(value):
+    return None if value != value else float(value)
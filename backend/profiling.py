@@ -0,0 +1,171 @@
+"""
+Opt-in per-request profiling.
+
+When installed, a request is profiled if it carries a valid signed
+X-Profile header or is picked by the sampling rate. The handler runs under
+cProfile, SQL statements issued on the request thread are counted and
+timed, and the result is written to a bounded directory as a pstats file
+plus a JSON summary. Nothing is registered unless profiling is installed,
+so the mode costs nothing when it is off.
+"""
+
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import secrets
+import threading
+import time
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_HEADER = 'X-Profile'
+MAX_CLOCK_SKEW = 300
+_active = threading.local()
+
+
+def sign(secret, method, path, ts=None):
+    """Header value authorizing a profile of `method path`, valid for MAX_CLOCK_SKEW seconds"""
+    ts = int(time.time() if ts is None else ts)
+    digest = hmac.new(secret.encode(), f'{ts} {method.upper()} {path}'.encode(), hashlib.sha256).hexdigest()
+    return f'{ts}:{digest}'
+
+
+def verify(secret, value, method, path, now=None):
+    ts, _, digest = value.partition(':')
+    if not ts.isdigit() or not digest:
+        return False
+    now = time.time() if now is None else now
+    if abs(now - int(ts)) > MAX_CLOCK_SKEW:
+        return False
+    return hmac.compare_digest(sign(secret, method, path, int(ts)), value)
+
+
+class RequestProfile:
+    """cProfile plus per-statement SQL counts and timings for one request"""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.statements = {}
+        self.started = None
+        self.duration = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        _active.profile = self
+
+    def stop(self):
+        self.profiler.disable()
+        _active.profile = None
+        self.duration = time.perf_counter() - self.started
+
+    def record_sql(self, statement, seconds):
+        entry = self.statements.get(statement)
+        if entry is None:
+            entry = self.statements[statement] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def sql_summary(self):
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            'count': sum(count for count, _ in self.statements.values()),
+            'total_ms': round(sum(seconds for _, seconds in self.statements.values()) * 1000, 3),
+            'statements': [
+                {'statement': statement, 'count': count, 'total_ms': round(seconds * 1000, 3)}
+                for statement, (count, seconds) in ranked
+            ],
+        }
+
+
+class ProfileStore:
+    """Directory keeping the newest `max_profiles` profiles (.prof + .json pairs)"""
+
+    def __init__(self, directory, max_profiles=50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def save(self, profile, summary):
+        """Write a profile and its summary; returns the profile id"""
+        slug = re.sub(r'[^a-z0-9]+', '-', summary['route'].lower()).strip('-') or 'root'
+        profile_id = f'{int(time.time() * 1000)}-{slug}-{secrets.token_hex(3)}'
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.profiler.dump_stats(os.path.join(self.directory, f'{profile_id}.prof'))
+            with open(os.path.join(self.directory, f'{profile_id}.json'), 'w') as fh:
+                json.dump(dict(summary, id=profile_id), fh, indent=2)
+            self._prune()
+        return profile_id
+
+    def _prune(self):
+        ids = sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.prof'))
+        for profile_id in ids[:max(0, len(ids) - self.max_profiles)]:
+            for suffix in ('.prof', '.json'):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_active, 'profile', None) is not None:
+        context.profile_started = time.perf_counter()
+
+
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    profile = getattr(_active, 'profile', None)
+    if profile is not None and hasattr(context, 'profile_started'):
+        profile.record_sql(statement, time.perf_counter() - context.profile_started)
+
+
+def install(app, store, secret=None, sample_rate=0.0, draw=random.random):
+    """Profile requests signed with `secret` or sampled at `sample_rate`"""
+    event.listen(Engine, 'before_cursor_execute', _query_started)
+    event.listen(Engine, 'after_cursor_execute', _query_finished)
+
+    @app.before_request
+    def start_profile():
+        header = request.headers.get(PROFILE_HEADER)
+        signed = bool(secret and header and verify(secret, header, request.method, request.path))
+        if not signed and not (sample_rate and draw() < sample_rate):
+            return
+        profile = RequestProfile()
+        try:
+            profile.start()
+        except ValueError:
+            # Another profiler is already running (cProfile is process-wide on Python 3.12+)
+            return
+        g.profile = profile
+
+    @app.after_request
+    def save_profile(response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        profile.stop()
+        profile_id = store.save(profile, {
+            'method': request.method,
+            'path': request.path,
+            'route': request.url_rule.rule if request.url_rule is not None else 'unmatched',
+            'status': response.status_code,
+            'duration_ms': round(profile.duration * 1000, 3),
+            'sql': profile.sql_summary(),
+        })
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def discard_profile(error):
+        # after_request is skipped when the handler raised; don't leave the profiler running
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.stop()
+
+    return store
@@ -0,0 +1,100 @@
+"""
+Structured, asynchronous logging.
+
+Request threads only put LogRecords on an in-process queue; a
+QueueListener thread formats them as one JSON object per line, redacting
+bearer tokens, JWTs and credential fields on the way out. Successful
+requests can be sampled, errors are always logged.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+REDACTED = '[REDACTED]'
+_SECRETS = [
+    (re.compile(r'(?i)\b(bearer\s+)[A-Za-z0-9._~+/-]+=*'), r'\1' + REDACTED),
+    (re.compile(r'\beyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*'), REDACTED),
+    (re.compile(r'(?i)("?\b(?:access_token|refresh_token|token|password|secret)"?\s*[:=]\s*"?)[^"&\s,}]+'), r'\1' + REDACTED),
+]
+
+
+def redact(text):
+    for pattern, replacement in _SECRETS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; `extra={'fields': {...}}` adds top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': redact(record.getMessage()),
+        }
+        for key, value in getattr(record, 'fields', {}).items():
+            entry[key] = redact(value) if isinstance(value, str) else value
+        if record.exc_info:
+            entry['exc'] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+
+class _EnqueueHandler(QueueHandler):
+    """Enqueue the record untouched; formatting happens on the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class _Listener(QueueListener):
+    """QueueListener whose stop() may be called again, e.g. at exit after an explicit stop"""
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+class RequestSampler:
+    """Logs every error response and a `rate` fraction of the rest"""
+
+    def __init__(self, rate=1.0, draw=random.random):
+        self.rate = rate
+        self.draw = draw
+
+    def sample(self, status_code):
+        return status_code >= 400 or self.rate >= 1 or self.draw() < self.rate
+
+
+def setup_logging(logger, level=logging.INFO, stream=None):
+    """Route `logger` through a queue to a JSON stream handler; returns the started listener
+
+    Calling it again for the same logger without a stream (e.g. once per
+    create_app) only updates the level and returns the running listener.
+    """
+    for handler in logger.handlers:
+        if stream is None and isinstance(handler, _EnqueueHandler):
+            logger.setLevel(level)
+            return handler.listener
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    listener = _Listener(records, output, respect_handler_level=True)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = _EnqueueHandler(records)
+    handler.listener = listener
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -41,12 +41,7 @@ fi
 
 # Initialize database
 echo "🗄️ Initializing database..."
-python -c "
-from app import app, db
-with app.app_context():
-    db.create_all()
-    print('Database tables created successfully!')
-"
+python start.py --init-db
 
 # Run tests
 echo "🧪 Running tests..."
@@ -0,0 +1,90 @@
+"""
+Compact 7-day sparklines for every coin in a market snapshot.
+
+Each coin's stored or cached price series is resampled to a fixed number of
+buckets (last price per bucket), then the whole (coins x points) matrix is
+quantized in one pass to uint8 levels between each row's min and max and
+base64-encoded, so a trend line costs a few dozen bytes per coin. Results
+are memoized per snapshot version.
+"""
+
+import base64
+import threading
+
+import numpy as np
+
+WINDOW_MS = 7 * 24 * 3_600_000
+DEFAULT_POINTS = 56
+# Level reserved for buckets before a coin's series starts
+GAP = 255
+LEVELS = GAP - 1
+
+
+def resample(series, start, end, points):
+    """Last price in each of `points` equal buckets over [start, end] for [(timestamps, prices), ...].
+
+    Returns a (len(series), points) matrix with NaN where a coin has no price yet.
+    """
+    edges = start + (end - start) * np.arange(1, points + 1, dtype=np.int64) // points
+    matrix = np.full((len(series), points), np.nan)
+    for row, (timestamps, prices) in enumerate(series):
+        if timestamps is None or len(timestamps) == 0:
+            continue
+        idx = np.searchsorted(np.asarray(timestamps, dtype=np.int64), edges, side='right') - 1
+        valid = idx >= 0
+        matrix[row, valid] = np.asarray(prices, dtype=np.float64)[idx[valid]]
+    return matrix
+
+
+def quantize(matrix):
+    """Scale each row to 0..LEVELS between its min and max; returns (lows, highs, codes)"""
+    empty = np.isnan(matrix).all(axis=1)
+    filled = np.where(empty[:, None], 0.0, matrix)
+    lows = np.nanmin(filled, axis=1)
+    highs = np.nanmax(filled, axis=1)
+    spans = highs - lows
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = (matrix - lows[:, None]) / np.where(spans > 0, spans, 1.0)[:, None]
+    codes = np.rint(scaled * LEVELS)
+    codes[np.isnan(codes)] = GAP
+    return lows, highs, codes.astype(np.uint8)
+
+
+def compact(series, start, end, points=DEFAULT_POINTS):
+    """Encoded sparklines for [(timestamps, prices), ...]; None for series without data"""
+    matrix = resample(series, start, end, points)
+    lows, highs, codes = quantize(matrix)
+    has_data = ~np.isnan(matrix).all(axis=1)
+    return [
+        {'min': low, 'max': high, 'points': base64.b64encode(row).decode('ascii')} if present else None
+        for low, high, row, present in zip(lows.tolist(), highs.tolist(), codes, has_data.tolist())
+    ]
+
+
+class SparklineBook:
+    """Sparklines for the coins of the latest snapshot, computed once per snapshot version.
+
+    `load(coin_id, start, end)` returns (timestamps, prices) or None and must
+    not call upstream - coins without stored or cached data get no sparkline.
+    """
+
+    def __init__(self, load, points=DEFAULT_POINTS, window=WINDOW_MS):
+        self.load = load
+        self.points = points
+        self.window = window
+        self._version = None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, snapshot, ids):
+        """Sparklines for `ids` (None where unavailable) as of `snapshot`"""
+        with self._lock:
+            if snapshot.ts is None:
+                return [None] * len(ids)
+            if self._version != snapshot.version:
+                end = snapshot.ts
+                start = end - self.window
+                series = [self.load(coin_id, start, end) or (None, None) for coin_id in snapshot.ids]
+                self._entries = dict(zip(snapshot.ids, compact(series, start, end, self.points)))
+                self._version = snapshot.version
+            return [self._entries.get(coin_id) for coin_id in ids]
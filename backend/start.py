@@ -6,25 +6,27 @@ This script sets up and runs the backend server with proper initialization
 
 import os
 import sys
-from app import app, db
+from app import create_app, init_db, start_market_poller
 
-def setup_database():
-    """Initialize the database"""
+def setup_database(app):
+    """Initialize the database (one-time step: python start.py --init-db)"""
     print("🗄️ Setting up database...")
-    with app.app_context():
-        try:
-            db.create_all()
-            print("✅ Database initialized successfully!")
-        except Exception as e:
-            print(f"❌ Database setup failed: {e}")
-            sys.exit(1)
+    try:
+        init_db(app)
+        print("✅ Database initialized successfully!")
+    except Exception as e:
+        print(f"❌ Database setup failed: {e}")
+        sys.exit(1)
 
 def main():
     """Main function to start the server"""
-    print("🚀 Crypto Tracker Backend Starting...")
+    app = create_app()
+    if '--init-db' in sys.argv[1:]:
+        setup_database(app)
+        return
     
-    # Setup database
-    setup_database()
+    print("🚀 Crypto Tracker Backend Starting...")
+    start_market_poller(app)
     
     # Get configuration
     port = int(os.getenv('PORT', 5000))
@@ -39,14 +41,26 @@ def main():
 
 🔗 Available Endpoints:
    - GET  /api/health              - Health check
+   - GET  /api/metrics             - Prometheus metrics
    - POST /api/auth/register       - User registration
    - POST /api/auth/login          - User login
    - GET  /api/auth/me             - Get current user (JWT required)
-   - GET  /api/crypto/markets      - Get crypto market data
+   - GET  /api/crypto/markets      - Get crypto market data (sparkline=compact)
    - GET  /api/crypto/<id>/chart   - Get crypto chart data
+   - GET  /api/crypto/<id>/candles - Get OHLCV candles (res=1m|5m|1h|1d)
+   - GET  /api/crypto/correlation  - Get correlation matrix (ids=, days=)
+   - GET  /api/crypto/movers       - Get top gainers/losers/volume (kind=, limit=)
+   - GET  /api/crypto/global       - Get global market cap, dominance and breadth (history=true)
+   - GET  /api/crypto/export       - Stream price history (ids=, from=, to=, format=csv|ndjson)
    - GET  /api/favorites           - Get user favorites (JWT required)
    - POST /api/favorites           - Add favorite (JWT required)
    - DELETE /api/favorites/<id>    - Remove favorite (JWT required)
+   - GET/POST /api/alerts          - List/create price alerts (JWT required)
+   - DELETE /api/alerts/<id>       - Remove price alert (JWT required)
+   - GET  /api/portfolio/holdings  - List holdings (JWT required)
+   - PUT/DELETE /api/portfolio/holdings/<id> - Set/remove a holding (JWT required)
+   - GET  /api/portfolio/valuation - Value holdings at live prices (JWT required)
+   - GET  /api/portfolio/history   - Portfolio value over time (JWT required)
 
 🌐 Frontend CORS: Configured for Lovable domains
 💾 Data: SQLite database with user auth and favorites
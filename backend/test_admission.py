@@ -0,0 +1,51 @@
+import threading
+import unittest
+
+from admission import AdmissionGate, Deadline, Overloaded
+
+
+class AdmissionTestCase(unittest.TestCase):
+
+    def test_gate_queues_then_sheds(self):
+        """Test requests beyond the limit wait in a bounded queue and the rest are rejected at once"""
+        gate = AdmissionGate('upstream', limit=1, queue=1, max_wait=5, retry_after=0.2)
+        gate.acquire()
+
+        admitted = threading.Event()
+        waiter = threading.Thread(target=lambda: (gate.acquire(), admitted.set()))
+        waiter.start()
+        while gate.waiting == 0:
+            pass
+
+        with self.assertRaises(Overloaded) as caught:
+            gate.acquire()
+        self.assertEqual(caught.exception.retry_after, 1)
+        self.assertEqual(gate.rejected, 1)
+
+        gate.release()
+        waiter.join()
+        self.assertTrue(admitted.is_set())
+        self.assertEqual((gate.active, gate.waiting), (1, 0))
+        gate.release()
+        self.assertEqual(gate.active, 0)
+
+    def test_wait_is_bounded_by_timeout(self):
+        """Test a queued request gives up after the caller's remaining time, not max_wait"""
+        gate = AdmissionGate('upstream', limit=1, queue=4, max_wait=5)
+        gate.acquire()
+        with self.assertRaises(Overloaded):
+            gate.acquire(timeout=0.01)
+        self.assertEqual((gate.waiting, gate.rejected), (0, 1))
+
+    def test_deadline_clamps_timeouts(self):
+        """Test downstream timeouts never exceed the time left"""
+        now = [100.0]
+        deadline = Deadline(2.5, clock=lambda: now[0])
+        self.assertEqual(deadline.timeout(10), 2.5)
+        self.assertEqual(deadline.timeout(1), 1)
+        now[0] = 103.0
+        self.assertEqual(deadline.timeout(10), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from alerts import AlertBook
+from market_universe import MarketSnapshot
+
+
+class AlertBookTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.book = AlertBook()
+        self.book.load([
+            (1, 'bitcoin', 'above', 105.0),
+            (2, 'bitcoin', 'above', 110.0),
+            (3, 'bitcoin', 'above', 120.0),
+            (4, 'bitcoin', 'below', 95.0),
+            (5, 'bitcoin', 'below', 90.0),
+            (6, 'ethereum', 'above', 10.0),
+        ])
+        self.book.evaluate('bitcoin', 100.0)
+
+    def test_crossing_fires_only_thresholds_between_old_and_new(self):
+        """Test upward and downward moves fire the crossed thresholds once"""
+        self.assertEqual(sorted(self.book.evaluate('bitcoin', 112.0)), [1, 2])
+        self.assertEqual(self.book.evaluate('bitcoin', 101.0), [])
+        self.assertEqual(self.book.evaluate('bitcoin', 111.0), [])
+        self.assertEqual(sorted(self.book.evaluate('bitcoin', 89.0)), [4, 5])
+        self.assertEqual(self.book.evaluate('bitcoin', 125.0), [3])
+        self.assertEqual(len(self.book), 1)
+
+    def test_first_price_fires_already_satisfied_alerts(self):
+        """Test alerts that already hold on the first observed price fire"""
+        self.assertEqual(self.book.evaluate('ethereum', 12.0), [6])
+
+    def test_added_alerts_fire_when_already_satisfied(self):
+        """Test alerts created on the far side of the last price fire on the next tick"""
+        self.book.add(7, 'bitcoin', 'above', 99.0)
+        self.book.add(8, 'bitcoin', 'below', 101.0)
+        self.book.add(9, 'bitcoin', 'above', 130.0)
+        self.assertEqual(sorted(self.book.evaluate('bitcoin', 100.0)), [7, 8])
+        self.assertEqual(self.book.evaluate('bitcoin', 131.0), [1, 2, 3, 9])
+
+    def test_added_alerts_wait_when_price_moves_away(self):
+        """Test alerts added since the last tick only fire once the new price satisfies them"""
+        self.book.add(7, 'bitcoin', 'above', 95.0)
+        self.assertEqual(sorted(self.book.evaluate('bitcoin', 90.0)), [4, 5])
+        self.book.add(8, 'bitcoin', 'below', 105.0)
+        self.assertEqual(sorted(self.book.evaluate('bitcoin', 110.0)), [1, 2, 7])
+        self.assertEqual(self.book.evaluate('bitcoin', 104.0), [8])
+
+    def test_removed_alerts_do_not_fire(self):
+        """Test removed alerts are skipped"""
+        self.assertTrue(self.book.remove(2))
+        self.assertFalse(self.book.remove(2))
+        self.assertEqual(self.book.evaluate('bitcoin', 115.0), [1])
+
+    def test_evaluate_snapshot(self):
+        """Test snapshot evaluation returns fired ids with the triggering price"""
+        snapshot = MarketSnapshot([{'id': 'bitcoin', 'current_price': 106.0}, {'id': 'solana', 'current_price': 1.0}])
+        self.assertEqual(self.book.evaluate_snapshot(snapshot), [(1, 106.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,24 +2,29 @@ import unittest
 import json
 import tempfile
 import os
-from app import app, db, User, Favorite
+import shutil
+from unittest import mock
+from app import create_app, db, services, User, Favorite
 
 class CryptoTrackerTestCase(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures"""
-        self.db_fd, app.config['DATABASE'] = tempfile.mkstemp()
-        app.config['TESTING'] = True
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + app.config['DATABASE']
-        app.config['JWT_SECRET_KEY'] = 'test-secret-key'
-        app.config['SECRET_KEY'] = 'test-secret-key'
-        
-        self.app = app.test_client()
-        self.app_context = app.app_context()
-        self.app_context.push()
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        self.data_dir = tempfile.mkdtemp()
+        self.flask_app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + self.db_path,
+            'JWT_SECRET_KEY': 'test-secret-key',
+            'SECRET_KEY': 'test-secret-key',
+            'TICK_ARCHIVE_DIR': os.path.join(self.data_dir, 'ticks'),
+        })
+        self.services = services(self.flask_app)
         
-        with app.app_context():
-            db.create_all()
+        self.app = self.flask_app.test_client()
+        self.app_context = self.flask_app.app_context()
+        self.app_context.push()
+        db.create_all()
     
     def tearDown(self):
         """Tear down test fixtures"""
@@ -27,7 +32,8 @@ class CryptoTrackerTestCase(unittest.TestCase):
         db.drop_all()
         self.app_context.pop()
         os.close(self.db_fd)
-        os.unlink(app.config['DATABASE'])
+        os.unlink(self.db_path)
+        shutil.rmtree(self.data_dir)
     
     def test_health_check(self):
         """Test health check endpoint"""
@@ -36,6 +42,15 @@ class CryptoTrackerTestCase(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data['status'], 'healthy')
     
+    def test_create_app_builds_subsystems_lazily(self):
+        """Test create_app builds no pipeline, caches or pools until they are first used"""
+        self.assertFalse(set(vars(self.services)) & set(self.services._BUILDERS))
+        
+        self.assertIs(self.services.movers_board, self.services.movers_board)
+        self.assertIn('market_poller', vars(self.services))
+        self.assertNotIn('upstream_pool', vars(self.services))
+        self.assertNotIn('hashing_pool', vars(self.services))
+    
     def test_user_registration(self):
         """Test user registration"""
         response = self.app.post('/api/auth/register', 
@@ -243,6 +258,337 @@ class CryptoTrackerTestCase(unittest.TestCase):
         # In real tests, you'd mock the requests call
         self.assertIn(response.status_code, [200, 503, 504])
     
+    def test_crypto_candles_endpoint(self):
+        """Test candle endpoint serves bars from the candle engine"""
+        candle_engine = self.services.candle_engine
+        
+        response = self.app.get('/api/crypto/unknown-coin/candles?res=1m')
+        self.assertEqual(response.status_code, 404)
+        
+        response = self.app.get('/api/crypto/bitcoin/candles?res=2m')
+        self.assertEqual(response.status_code, 400)
+        
+        candle_engine.ingest('test-candle-coin', 60_000, 100)
+        candle_engine.ingest('test-candle-coin', 120_000, 110)
+        response = self.app.get('/api/crypto/test-candle-coin/candles?res=1m&from=100000')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['candles'], [[120000, 110, 110, 110, 110, 0.0]])
+    
+    def test_crypto_chart_from_tick_archive(self):
+        """Test chart endpoint serves hourly points from the tick archive when it covers the window"""
+        from market_poller import now_ms
+        
+        end = now_ms()
+        self.services.tick_archive.extend('bitcoin', [end - 3 * 86_400_000 + i * 600_000 for i in range(432)], [100.0] * 432, [1.0] * 432, [2.0] * 432)
+        
+        response = self.app.get('/api/crypto/bitcoin/chart?days=1')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertIn(len(data['prices']), [24, 25])
+        self.assertEqual(data['prices'][-1][1], 100.0)
+    
+    def test_crypto_export_streams_history(self):
+        """Test export streams CSV rows from the tick archive, gzipped when accepted"""
+        import gzip
+        
+        self.services.tick_archive.extend('bitcoin', [1000, 2000, 3000], [1.5, 2.5, 3.5], [10.0] * 3, [20.0] * 3)
+        
+        response = self.app.get('/api/crypto/export?ids=bitcoin&from=2000&format=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.data.decode().splitlines()[1:], ['bitcoin,2000,2.5,10.0,20.0', 'bitcoin,3000,3.5,10.0,20.0'])
+        
+        response = self.app.get('/api/crypto/export?ids=bitcoin&format=ndjson', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(len(gzip.decompress(response.data).splitlines()), 3)
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        
+        response = self.app.get('/api/crypto/export?ids=bitcoin&format=ndjson', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(len(response.data.splitlines()), 3)
+        
+        response = self.app.get('/api/crypto/export?ids=bitcoin&format=xml')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_crypto_markets_from_snapshot(self):
+        """Test markets endpoint filters, sorts and projects a fresh snapshot without calling upstream"""
+        from market_poller import now_ms
+        from market_universe import MarketUniverse
+        
+        universe = MarketUniverse()
+        universe.rebuild([
+            {'id': 'bitcoin', 'symbol': 'btc', 'current_price': 60000.0, 'market_cap': 1.2e12, 'total_volume': 3e10},
+            {'id': 'ethereum', 'symbol': 'eth', 'current_price': 3000.0, 'market_cap': 3.6e11, 'total_volume': 4e10},
+            {'id': 'tether', 'symbol': 'usdt', 'current_price': 1.0, 'market_cap': 1.1e11, 'total_volume': 5e10}
+        ], ts=now_ms())
+        
+        with mock.patch.object(self.services, 'market_universe', universe), mock.patch('app.requests.get') as upstream:
+            response = self.app.get('/api/crypto/markets?order=volume_desc&per_page=2&fields=id,total_volume')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.data), [
+                {'id': 'tether', 'total_volume': 5e10},
+                {'id': 'ethereum', 'total_volume': 4e10}
+            ])
+            
+            response = self.app.get('/api/crypto/markets?min_price=2&max_volume=3.5e10&fields=id')
+            self.assertEqual(json.loads(response.data), [{'id': 'bitcoin'}])
+            response = self.app.get('/api/crypto/markets?ids=bitcoin,tether&min_market_cap=1e12&fields=id')
+            self.assertEqual(json.loads(response.data), [{'id': 'bitcoin'}])
+            
+            response = self.app.get('/api/crypto/markets?order=name_desc')
+            self.assertEqual(response.status_code, 400)
+            response = self.app.get('/api/crypto/markets?min_price=cheap')
+            self.assertEqual(response.status_code, 400)
+            upstream.assert_not_called()
+    
+    def test_crypto_markets_stale_refresh_is_single_flight(self):
+        """Test concurrent requests on a stale snapshot trigger one upstream refresh"""
+        import threading
+        import time
+        from market_poller import now_ms
+        
+        self.services.market_universe.rebuild([{'id': 'bitcoin', 'current_price': 1.0}], ts=now_ms() - 3_600_000)
+        
+        def slow_markets(*args, **kwargs):
+            time.sleep(0.2)
+            return mock.Mock(status_code=200, json=mock.Mock(return_value=[{'id': 'bitcoin', 'current_price': 2.0}]))
+        
+        statuses = []
+        
+        def fetch():
+            statuses.append(self.flask_app.test_client().get('/api/crypto/markets?fields=id,current_price').status_code)
+        
+        with mock.patch('app.requests.get', side_effect=slow_markets) as upstream:
+            threads = [threading.Thread(target=fetch) for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(statuses, [200] * 6)
+        self.assertEqual(upstream.call_count, 1)
+        self.assertEqual(self.services.market_universe.snapshot.version, 2)
+    
+    def test_crypto_markets_compact_sparkline(self):
+        """Test sparkline=compact attaches quantized 7-day lines from the tick archive"""
+        import base64
+        from market_poller import now_ms
+        from market_universe import MarketUniverse
+        
+        end = now_ms()
+        self.services.tick_archive.extend('bitcoin', [end - 7 * 86_400_000 + i * 3_600_000 for i in range(169)], [float(i) for i in range(169)], [1.0] * 169, [2.0] * 169)
+        universe = MarketUniverse()
+        universe.rebuild([
+            {'id': 'bitcoin', 'symbol': 'btc', 'current_price': 168.0, 'market_cap': 1.2e12},
+            {'id': 'ethereum', 'symbol': 'eth', 'current_price': 3000.0, 'market_cap': 3.6e11}
+        ], ts=end)
+        
+        with mock.patch.object(self.services, 'market_universe', universe), mock.patch('app.requests.get') as upstream:
+            response = self.app.get('/api/crypto/markets?sparkline=compact&fields=id')
+            self.assertEqual(response.status_code, 200)
+            bitcoin, ethereum = json.loads(response.data)
+            self.assertEqual((bitcoin['sparkline_7d']['min'], bitcoin['sparkline_7d']['max']), (3.0, 168.0))
+            self.assertEqual(base64.b64decode(bitcoin['sparkline_7d']['points'])[-1], 254)
+            self.assertIsNone(ethereum['sparkline_7d'])
+            # The chart cache fallback is a peek, so it doesn't skew the cache hit ratio
+            self.assertEqual(self.services.chart_cache.misses, 0)
+            
+            response = self.app.get('/api/crypto/markets?sparkline=true')
+            self.assertEqual(response.status_code, 400)
+            
+            response = self.app.get('/api/crypto/markets?sparkline=compact&fields=current_price')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('id', json.loads(response.data)['error'])
+            upstream.assert_not_called()
+    
+    def test_crypto_correlation_endpoint(self):
+        """Test correlation matrix is computed from archived series"""
+        import numpy as np
+        from market_poller import now_ms
+        
+        ts = now_ms() - 2 * 86_400_000 + np.arange(49 * 6) * 600_000
+        walk = np.exp(np.cumsum(np.random.default_rng(3).normal(0, 0.01, ts.size)))
+        self.services.tick_archive.extend('bitcoin', ts, 100 * walk, walk, walk)
+        self.services.tick_archive.extend('wrapped-bitcoin', ts, 99 * walk, walk, walk)
+        
+        response = self.app.get('/api/crypto/correlation?ids=bitcoin,wrapped-bitcoin&days=1')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['ids'], ['bitcoin', 'wrapped-bitcoin'])
+        self.assertEqual(data['observations'], 24)
+        self.assertAlmostEqual(data['matrix'][0][1], 1.0, places=5)
+        
+        response = self.app.get('/api/crypto/correlation?ids=bitcoin&days=1')
+        self.assertEqual(response.status_code, 400)
+        
+        # Coins without archived history fall back to upstream; a failed fetch is not a 200 of nulls
+        with mock.patch('app.requests.get', return_value=mock.Mock(status_code=429)):
+            response = self.app.get('/api/crypto/correlation?ids=bitcoin,solana&days=1')
+        self.assertEqual(response.status_code, 503)
+        with mock.patch('app.requests.get', return_value=mock.Mock(status_code=500)):
+            response = self.app.get('/api/crypto/correlation?ids=bitcoin,solana&days=1')
+        self.assertEqual(response.status_code, 502)
+    
+    def test_crypto_data_batch(self):
+        """Test batch queries share canonicalized cache keys and report per-item status"""
+        upstream = mock.Mock(status_code=200)
+        upstream.json.return_value = [{'id': 'bitcoin'}]
+        
+        with mock.patch('app.requests.get', return_value=upstream) as get:
+            response = self.app.post('/api/crypto/data', json=[
+                {'endpoint': 'market', 'params': {'per_page': 10, 'sparkline': False}},
+                {'endpoint': 'market', 'params': {'sparkline': 'False', 'per_page': '10'}},
+                {'endpoint': 'chart', 'params': {'id': 'bitcoin', 'days': 7}},
+                {'endpoint': 'exchanges'}
+            ])
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            self.assertEqual([item['status'] for item in data], [200, 200, 200, 400])
+            self.assertEqual(data[0]['data'], [{'id': 'bitcoin'}])
+            self.assertEqual(get.call_count, 2)
+            
+            # Served from the cache the second time
+            response = self.app.post('/api/crypto/data', json={'endpoint': 'chart', 'params': {'id': 'bitcoin', 'days': '7'}})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(get.call_count, 2)
+            # The batch checked the cache before fetching; its miss is still counted once
+            self.assertEqual((self.services.chart_cache.hits, self.services.chart_cache.misses), (1, 1))
+    
+    def test_price_alerts(self):
+        """Test alerts are created, fired by a snapshot tick and recorded"""
+        from alerts import AlertBook
+        from market_universe import MarketSnapshot
+        import app as app_module
+        
+        response = self.app.post('/api/auth/register', 
+                                json={'email': 'test@example.com', 'password': 'password123'})
+        headers = {'Authorization': f"Bearer {json.loads(response.data)['access_token']}"}
+        
+        with mock.patch.object(self.services, 'alert_book', AlertBook()):
+            response = self.app.post('/api/alerts', json={'crypto_id': 'bitcoin', 'direction': 'sideways', 'threshold': 1},
+                                    headers=headers)
+            self.assertEqual(response.status_code, 400)
+            
+            response = self.app.post('/api/alerts', json={'crypto_id': 'bitcoin', 'direction': 'above', 'threshold': 70000},
+                                    headers=headers)
+            self.assertEqual(response.status_code, 201)
+            
+            app_module.evaluate_alerts(self.flask_app, self.services.alert_book, None, MarketSnapshot([{'id': 'bitcoin', 'current_price': 65000.0}]))
+            app_module.evaluate_alerts(self.flask_app, self.services.alert_book, None, MarketSnapshot([{'id': 'bitcoin', 'current_price': 71000.0}]))
+        
+        response = self.app.get('/api/alerts', headers=headers)
+        alert = json.loads(response.data)['alerts'][0]
+        self.assertEqual(alert['triggered_price'], 71000.0)
+        self.assertIsNotNone(alert['triggered_at'])
+    
+    def test_portfolio_valuation(self):
+        """Test holdings are saved and valued against the market snapshot"""
+        from market_universe import MarketUniverse
+        
+        response = self.app.post('/api/auth/register', 
+                                json={'email': 'test@example.com', 'password': 'password123'})
+        headers = {'Authorization': f"Bearer {json.loads(response.data)['access_token']}"}
+        
+        response = self.app.put('/api/portfolio/holdings/bitcoin', json={'quantity': 2, 'cost_basis': 50000},
+                               headers=headers)
+        self.assertEqual(response.status_code, 201)
+        response = self.app.put('/api/portfolio/holdings/bitcoin', json={'quantity': -1}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        
+        universe = MarketUniverse()
+        universe.rebuild([{'id': 'bitcoin', 'current_price': 30000.0}], ts=1)
+        with mock.patch.object(self.services, 'market_universe', universe):
+            response = self.app.get('/api/portfolio/valuation', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['summary']['total_value'], 60000.0)
+        self.assertEqual(data['summary']['unrealized_pnl'], 10000.0)
+        self.assertEqual(data['holdings'][0]['allocation'], 1.0)
+        
+        response = self.app.get('/api/admin/portfolio-report', headers=headers)
+        self.assertEqual(response.status_code, 403)
+    
+    def test_metrics_endpoint(self):
+        """Test metrics expose route latency, DB query time and upstream status"""
+        self.app.post('/api/auth/register', data=json.dumps({'email': 'metrics@example.com', 'password': 'password123'}), content_type='application/json')
+        self.app.get('/api/health')
+        with mock.patch('app.requests.get') as upstream:
+            upstream.return_value.status_code = 429
+            self.app.get('/api/crypto/ethereum/chart?days=3')
+        
+        response = self.app.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.data.decode()
+        self.assertIn('crypto_tracker_http_requests_total{method="GET",route="/api/health",status="200"}', body)
+        self.assertIn('crypto_tracker_http_request_duration_seconds_bucket{method="POST",route="/api/auth/register",le="+Inf"}', body)
+        self.assertIn('crypto_tracker_db_query_duration_seconds_count{operation="INSERT"}', body)
+        self.assertIn('crypto_tracker_upstream_requests_total{endpoint="market_chart",status="429"}', body)
+        self.assertIn('crypto_tracker_hashing_pool_queue_depth 0', body)
+    
+    def test_crypto_global_endpoint(self):
+        """Test global aggregates are served from the latest snapshot"""
+        response = self.app.get('/api/crypto/global')
+        self.assertEqual(response.status_code, 503)
+        
+        self.services.market_universe.rebuild([
+            {'id': 'bitcoin', 'market_cap': 750.0, 'total_volume': 5.0, 'price_change_percentage_24h': 1.5},
+            {'id': 'ethereum', 'market_cap': 250.0, 'total_volume': 3.0, 'price_change_percentage_24h': -0.5}
+        ], ts=60_000)
+        response = self.app.get('/api/crypto/global?history=true')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual((data['total_market_cap'], data['btc_dominance']), (1000.0, 75.0))
+        self.assertEqual(data['breadth'], {'advancing': 1, 'declining': 1, 'unchanged': 0})
+        self.assertEqual(len(data['history']['points']), 1)
+        
+        response = self.app.get('/api/crypto/global?history=yes')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_admission_sheds_upstream_routes(self):
+        """Test a full upstream gate sheds chart requests with Retry-After while local routes still answer"""
+        gate = self.services.admission_gates['upstream']
+        held = [gate.acquire() for _ in range(gate.limit)]
+        try:
+            with mock.patch.object(gate, 'queue', 0), mock.patch('app.requests.get') as upstream:
+                response = self.app.get('/api/crypto/bitcoin/chart?days=3')
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response.headers['Retry-After'], '1')
+                upstream.assert_not_called()
+                
+                self.assertEqual(self.app.get('/api/health').status_code, 200)
+        finally:
+            for _ in held:
+                gate.release()
+        
+        response = self.app.get('/api/metrics')
+        self.assertIn('crypto_tracker_admission_rejected_total{route_class="upstream"} 1', response.get_data(as_text=True))
+    
+    def test_upstream_timeout_follows_request_deadline(self):
+        """Test the CoinGecko timeout is clamped to the time the client has left"""
+        with mock.patch('app.requests.get') as upstream:
+            upstream.return_value = mock.Mock(status_code=429)
+            self.app.get('/api/crypto/bitcoin/chart?days=3', headers={'X-Request-Timeout': '0.5'})
+            self.assertLessEqual(upstream.call_args.kwargs['timeout'], 0.5)
+            
+            response = self.app.get('/api/crypto/bitcoin/chart?days=3', headers={'X-Request-Timeout': '0'})
+            self.assertEqual(response.status_code, 504)
+            self.assertEqual(upstream.call_count, 1)
+    
+    def test_request_log_sampling(self):
+        """Test successful requests are sampled, errors always logged and tokens never logged"""
+        from request_log import RequestSampler
+        
+        with mock.patch.object(self.services, 'request_sampler', RequestSampler(0.0)), self.assertLogs('app.requests', level='INFO') as logs:
+            self.app.get('/api/health')
+            self.app.get('/api/favorites', headers={'Authorization': 'Bearer not.a.token'})
+        
+        self.assertEqual(len(logs.records), 1)
+        fields = logs.records[0].fields
+        self.assertEqual((fields['path'], fields['status'], fields['authenticated']), ('/api/favorites', 401, True))
+        self.assertNotIn('not.a.token', json.dumps(fields))
+    
     def test_password_encryption(self):
         """Test password encryption and verification"""
         from app import generate_salt, hash_password_pbkdf2, verify_password
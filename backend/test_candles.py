@@ -0,0 +1,66 @@
+import unittest
+from candles import CandleEngine
+
+MINUTE = 60_000
+HOUR = 60 * MINUTE
+
+
+class CandleEngineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = CandleEngine()
+
+    def test_ticks_update_open_minute_bar(self):
+        """Test ticks within one minute collapse into a single bar"""
+        self.engine.ingest('bitcoin', 0, 100)
+        self.engine.ingest('bitcoin', 10_000, 110)
+        self.engine.ingest('bitcoin', 20_000, 90)
+        self.engine.ingest('bitcoin', 30_000, 105, volume=7)
+
+        candles = self.engine.candles('bitcoin', '1m')
+        self.assertEqual(candles, [[0, 100, 110, 90, 105, 7]])
+
+    def test_coarser_bars_rolled_up_from_finer(self):
+        """Test 5m and 1h bars aggregate the closed and open 1m bars"""
+        prices = [100, 120, 80, 95, 101, 130, 99]
+        for minute, price in enumerate(prices):
+            self.engine.ingest('bitcoin', minute * MINUTE, price)
+
+        five = self.engine.candles('bitcoin', '5m')
+        self.assertEqual(five, [[0, 100, 120, 80, 101, 0.0], [5 * MINUTE, 130, 130, 99, 99, 0.0]])
+
+        hour = self.engine.candles('bitcoin', '1h')
+        self.assertEqual(hour, [[0, 100, 130, 80, 99, 0.0]])
+
+    def test_range_read(self):
+        """Test from/to select bars by bucket start"""
+        for hour in range(10):
+            self.engine.ingest('ethereum', hour * HOUR, hour + 1)
+
+        candles = self.engine.candles('ethereum', '1h', 3 * HOUR, 5 * HOUR)
+        self.assertEqual([bar[0] for bar in candles], [3 * HOUR, 4 * HOUR, 5 * HOUR])
+        self.assertEqual([bar[4] for bar in candles], [4, 5, 6])
+
+    def test_out_of_order_tick_dropped(self):
+        """Test ticks older than the open bar are ignored"""
+        self.engine.ingest('bitcoin', 5 * MINUTE, 100)
+        self.assertFalse(self.engine.ingest('bitcoin', MINUTE, 50))
+        self.assertEqual(len(self.engine.candles('bitcoin', '1m')), 1)
+
+    def test_unknown_coin_and_resolution(self):
+        """Test unknown coins return None and bad resolutions raise"""
+        self.assertIsNone(self.engine.candles('dogecoin', '1m'))
+        with self.assertRaises(ValueError):
+            self.engine.candles('bitcoin', '3m')
+
+    def test_retention_trims_closed_bars(self):
+        """Test closed bars beyond the retention window are dropped"""
+        engine = CandleEngine(retention={'1m': 10})
+        for minute in range(40):
+            engine.ingest('bitcoin', minute * MINUTE, minute)
+        self.assertLessEqual(len(engine.candles('bitcoin', '1m', include_open=False)), 13)
+        self.assertEqual(len(engine.candles('bitcoin', '5m')), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
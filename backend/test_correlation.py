@@ -0,0 +1,130 @@
+import unittest
+
+import numpy as np
+
+from correlation import CorrelationCache, RollingCorrelation, SeriesUnavailable, align, log_returns
+from ttl_cache import TTLCache
+
+HOUR = 3_600_000
+
+
+def random_walks(rows, columns, seed=1):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (rows, columns)), axis=0))
+
+
+class CorrelationTestCase(unittest.TestCase):
+
+    def test_align_forward_fills_and_trims_to_common_start(self):
+        """Test series are resampled to the last price per bucket"""
+        grid, prices = align([
+            ([0, HOUR + 5, 3 * HOUR], [1.0, 2.0, 4.0]),
+            ([HOUR, 2 * HOUR + 10], [10.0, 20.0]),
+        ], 0, 3 * HOUR, HOUR)
+        self.assertEqual(grid.tolist(), [HOUR, 2 * HOUR, 3 * HOUR])
+        self.assertEqual(prices.tolist(), [[2.0, 10.0], [2.0, 20.0], [4.0, 20.0]])
+
+    def test_matrix_matches_numpy_corrcoef(self):
+        """Test the sufficient-statistics matrix equals np.corrcoef"""
+        returns = log_returns(random_walks(200, 4))
+        rolling = RollingCorrelation(returns)
+        np.testing.assert_allclose(rolling.matrix(), np.corrcoef(returns, rowvar=False), atol=1e-9)
+
+    def test_incremental_window_matches_recompute(self):
+        """Test appending bars and expiring old ones matches a fresh computation"""
+        returns = log_returns(random_walks(300, 3))
+        rolling = RollingCorrelation(returns[:100], window=100)
+        for start in range(100, 299, 7):
+            rolling.append(returns[start:start + 7])
+        expected = np.corrcoef(returns[-100:], rowvar=False)
+        self.assertEqual(rolling.observations, 100)
+        np.testing.assert_allclose(rolling.matrix(), expected, atol=1e-9)
+
+    def test_constant_series_is_nan(self):
+        """Test zero-variance series yield NaN correlations"""
+        prices = random_walks(50, 2)
+        prices[:, 1] = 5.0
+        matrix = RollingCorrelation(log_returns(prices)).matrix()
+        self.assertTrue(np.isnan(matrix[0, 1]))
+
+    def test_cache_extends_with_new_bars_only(self):
+        """Test a cached entry is reused until a new bar completes, then extended"""
+        prices = random_walks(24 * 4, 2)
+        grid = np.arange(prices.shape[0], dtype=np.int64) * HOUR
+        loads = []
+
+        def load(coin_id, start, end):
+            loads.append((coin_id, start, end))
+            column = 0 if coin_id == 'bitcoin' else 1
+            return grid, prices[:, column]
+
+        cache = CorrelationCache()
+        now = 3 * 24 * HOUR + 10
+        ids, observations, first = cache.get(['ethereum', 'bitcoin'], 1, HOUR, load, now)
+        self.assertEqual(ids, ['bitcoin', 'ethereum'])
+        self.assertEqual(observations, 24)
+
+        cache.get(['bitcoin', 'ethereum'], 1, HOUR, load, now + 1000)
+        self.assertEqual(len(loads), 2)
+
+        _, observations, later = cache.get(['bitcoin', 'ethereum'], 1, HOUR, load, now + 5 * HOUR)
+        self.assertEqual(observations, 24)
+        window = log_returns(prices[24 * 2 + 4:24 * 3 + 5])
+        np.testing.assert_allclose(later, np.corrcoef(window, rowvar=False), atol=1e-9)
+
+    def test_incomplete_results_are_not_cached(self):
+        """Test an empty series is reloaded on the next request and loader errors propagate"""
+        prices = random_walks(24 * 2, 1)
+        grid = np.arange(prices.shape[0], dtype=np.int64) * HOUR
+        loads = []
+
+        def load(coin_id, start, end):
+            loads.append(coin_id)
+            if coin_id == 'ethereum':
+                return grid[:0], prices[:0, 0]
+            return grid, prices[:, 0]
+
+        cache = CorrelationCache()
+        now = 2 * 24 * HOUR - 10
+        _, observations, matrix = cache.get(['bitcoin', 'ethereum'], 1, HOUR, load, now)
+        self.assertEqual(observations, 0)
+        self.assertTrue(np.isnan(matrix).all())
+        cache.get(['bitcoin', 'ethereum'], 1, HOUR, load, now)
+        self.assertEqual(len(loads), 4)
+
+        def unavailable(coin_id, start, end):
+            raise SeriesUnavailable(coin_id, 429)
+
+        with self.assertRaises(SeriesUnavailable):
+            cache.get(['bitcoin', 'solana'], 1, HOUR, unavailable, now)
+
+
+class TTLCacheTestCase(unittest.TestCase):
+
+    def test_expiry_and_eviction(self):
+        """Test entries expire after ttl and least recently used are evicted"""
+        now = [0.0]
+        cache = TTLCache(10, maxsize=2, clock=lambda: now[0])
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        now[0] = 11
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_peek_leaves_counters_and_recency(self):
+        """Test peek reads live entries without touching hit/miss counters or LRU order"""
+        cache = TTLCache(10, maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.peek('a'), 1)
+        self.assertIsNone(cache.peek('z'))
+        cache.set('c', 3)
+        self.assertIsNone(cache.peek('a'))
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
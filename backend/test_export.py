@@ -0,0 +1,52 @@
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from export import CSV_HEADER, export_rows, gzip_stream
+from tick_archive import TickArchive
+
+
+class ExportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.archive = TickArchive(self.root)
+        ts = np.arange(1000, dtype=np.int64) * 1000
+        self.archive.extend('bitcoin', ts, ts * 0.5, np.full(1000, np.nan), ts)
+        self.archive.extend('ethereum', ts, ts * 0.25, ts, ts)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_iter_range_matches_range(self):
+        """Test batched reads cover exactly the rows of a single range read"""
+        batches = list(self.archive.iter_range('bitcoin', 1500, 900_000, batch_rows=128))
+        self.assertTrue(all(len(batch['timestamps']) <= 128 for batch in batches))
+        joined = np.concatenate([batch['timestamps'] for batch in batches])
+        self.assertEqual(joined.tolist(), self.archive.range('bitcoin', 1500, 900_000)['timestamps'].tolist())
+        self.assertEqual(list(self.archive.iter_range('dogecoin')), [])
+
+    def test_csv_rows_in_batches(self):
+        """Test CSV output has a header and one row per tick, coin after coin"""
+        chunks = list(export_rows(self.archive, ['ethereum', 'bitcoin'], 0, 9000, 'csv', batch_rows=4))
+        self.assertEqual(len(chunks), 1 + 3 + 3)
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual(lines[0] + '\n', CSV_HEADER)
+        self.assertEqual(lines[1], 'ethereum,0,0.0,0.0,0.0')
+        self.assertEqual(lines[11], 'bitcoin,0,0.0,,0.0')
+        self.assertEqual(len(lines), 21)
+
+    def test_ndjson_with_gzip(self):
+        """Test gzip streaming decodes to one JSON object per tick with null for missing values"""
+        body = b''.join(gzip_stream(export_rows(self.archive, ['bitcoin'], None, None, 'ndjson')))
+        rows = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+        self.assertEqual(len(rows), 1000)
+        self.assertEqual(rows[-1], {'id': 'bitcoin', 'timestamp': 999_000, 'price': 499_500.0, 'market_cap': None, 'volume': 999_000.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
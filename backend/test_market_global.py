@@ -0,0 +1,67 @@
+import json
+import random
+import unittest
+
+from market_global import HISTORY_COLUMNS, GlobalMarket
+from market_universe import MarketUniverse
+
+
+def coin(coin_id, cap, change_pct, volume=10.0, cap_change=1.0):
+    return {'id': coin_id, 'market_cap': cap, 'total_volume': volume,
+            'market_cap_change_24h': cap_change, 'price_change_percentage_24h': change_pct}
+
+
+class GlobalMarketTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.universe = MarketUniverse()
+        self.market = GlobalMarket(history_points=3)
+        self.universe.subscribe(self.market.update)
+
+    def summary(self):
+        return json.loads(self.market.body())
+
+    def test_aggregates_and_dominance(self):
+        """Test totals, dominance and breadth over the whole snapshot"""
+        self.assertIsNone(self.market.body())
+        self.universe.rebuild([
+            coin('bitcoin', 600.0, 2.0), coin('ethereum', 300.0, -1.0),
+            coin('tether', 100.0, 0.0, cap_change=None), coin('dust', None, None),
+        ], ts=1000)
+        data = self.summary()
+        self.assertEqual((data['coins'], data['total_market_cap'], data['total_volume']), (4, 1000.0, 40.0))
+        self.assertEqual((data['btc_dominance'], data['eth_dominance']), (60.0, 30.0))
+        self.assertEqual(data['breadth'], {'advancing': 1, 'declining': 1, 'unchanged': 2})
+        self.assertAlmostEqual(data['market_cap_change_percentage_24h'], 3 / 997 * 100)
+
+    def test_aggregates_follow_universe_changes(self):
+        """Test totals and breadth track price moves and coins joining or leaving the universe"""
+        rng = random.Random(7)
+        coins = {f'coin-{i}': coin(f'coin-{i}', rng.uniform(1, 1e9), rng.uniform(-5, 5)) for i in range(50)}
+        for tick in range(200):
+            for coin_id in rng.sample(sorted(coins), 5):
+                coins[coin_id] = coin(coin_id, rng.uniform(1, 1e9), rng.choice([rng.uniform(-5, 5), 0.0]))
+            if tick % 20 == 0:
+                coins.pop(rng.choice(sorted(coins)))
+                coins[f'new-{tick}'] = coin(f'new-{tick}', rng.uniform(1, 1e9), 1.0)
+            self.universe.rebuild(list(coins.values()), ts=tick)
+
+        data = self.summary()
+        self.assertAlmostEqual(data['total_market_cap'] / sum(c['market_cap'] for c in coins.values()), 1.0, places=12)
+        self.assertEqual(data['total_volume'], 10.0 * len(coins))
+        self.assertEqual(data['breadth']['advancing'], sum(c['price_change_percentage_24h'] > 0 for c in coins.values()))
+        self.assertEqual(data['breadth']['declining'], sum(c['price_change_percentage_24h'] < 0 for c in coins.values()))
+
+    def test_history_ring_keeps_latest_points(self):
+        """Test the history keeps the newest points oldest-first and the body is reused as-is"""
+        for ts in range(5):
+            self.universe.rebuild([coin('bitcoin', 100.0 + ts, 1.0)], ts=ts * 1000)
+        history = json.loads(self.market.body(history=True))['history']
+        self.assertEqual(history['columns'], list(HISTORY_COLUMNS))
+        self.assertEqual([point[0] for point in history['points']], [2000, 3000, 4000])
+        self.assertEqual(history['points'][-1], [4000, 104.0, 10.0, 100.0, 0.0, 1, 0])
+        self.assertIs(self.market.body(history=True), self.market.body(history=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
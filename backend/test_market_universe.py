@@ -0,0 +1,92 @@
+import math
+import threading
+import time
+import unittest
+
+from market_universe import MarketUniverse
+
+
+def coin(coin_id, price, cap, change=None, **extra):
+    return dict(
+        id=coin_id, symbol=coin_id[:3], name=coin_id.title(), current_price=price,
+        market_cap=cap, total_volume=cap / 10, price_change_percentage_24h=change, **extra
+    )
+
+
+class MarketUniverseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.universe = MarketUniverse()
+        self.snapshot = self.universe.rebuild([
+            coin('bitcoin', 60000.0, 1.2e12, 2.5, roi=None),
+            coin('ethereum', 3000.0, 3.6e11, -1.0, roi={'times': 80.1}),
+            coin('tether', 1.0, 1.1e11),
+            coin('solana', 150.0, 7.0e10, 8.0),
+        ], ts=1000)
+
+    def test_bulk_rebuild_builds_columns_and_index(self):
+        """Test numeric fields become float columns with NaN for missing values"""
+        self.assertEqual(len(self.snapshot), 4)
+        self.assertEqual(self.snapshot.index['solana'], 3)
+        self.assertEqual(self.snapshot.column('current_price').tolist(), [60000.0, 3000.0, 1.0, 150.0])
+        self.assertTrue(math.isnan(self.snapshot.column('price_change_percentage_24h')[2]))
+        self.assertEqual(self.universe.snapshot.version, 1)
+
+    def test_order_with_top_k_and_nan_last(self):
+        """Test ordering puts NaN last and top-k matches a full sort"""
+        field = 'price_change_percentage_24h'
+        full = self.snapshot.order(field).tolist()
+        self.assertEqual(full, [3, 0, 1, 2])
+        self.assertEqual(self.snapshot.order(field, limit=2).tolist(), [3, 0])
+        self.assertEqual(self.snapshot.order(field, descending=False).tolist(), [1, 0, 3, 2])
+
+    def test_where_filter(self):
+        """Test range filters over a numeric column"""
+        self.assertEqual(self.snapshot.where('current_price', minimum=100).tolist(), [0, 1, 3])
+        self.assertEqual(self.snapshot.where('current_price', maximum=200, rows=[2, 3]).tolist(), [2, 3])
+
+    def test_project_and_lookup(self):
+        """Test projections rebuild payload dicts and joins handle unknown ids"""
+        rows = self.snapshot.project([1], ['id', 'current_price', 'roi', 'price_change_percentage_24h'])
+        self.assertEqual(rows, [{'id': 'ethereum', 'current_price': 3000.0, 'roi': {'times': 80.1},
+                                 'price_change_percentage_24h': -1.0}])
+        self.assertIsNone(self.snapshot.project([2])[0]['price_change_percentage_24h'])
+        self.assertEqual(self.snapshot.lookup(['tether', 'dogecoin'], 'current_price'), [1.0, None])
+
+    def test_rebuild_notifies_listeners(self):
+        """Test listeners see the previous and current snapshot"""
+        seen = []
+        self.universe.subscribe(lambda previous, current: seen.append((previous.version, current.version)))
+        self.universe.rebuild([coin('bitcoin', 1.0, 1.0)], ts=2000)
+        self.assertEqual(seen, [(1, 2)])
+        self.assertTrue(self.universe.is_fresh(2500, 1000))
+        self.assertFalse(self.universe.is_fresh(5000, 1000))
+
+    def test_concurrent_rebuilds_notify_in_version_order(self):
+        """Test listeners never see a snapshot older than one they already got"""
+        seen = []
+
+        def listener(previous, current):
+            time.sleep(0.0001)
+            seen.append((previous.version, current.version))
+
+        self.universe.subscribe(listener)
+
+        def rebuild():
+            for _ in range(25):
+                self.universe.rebuild([coin('bitcoin', 1.0, 1.0)], ts=2000)
+
+        threads = [threading.Thread(target=rebuild) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(seen[-1][1], self.universe.snapshot.version)
+        for (_, before), (previous, current) in zip(seen, seen[1:]):
+            self.assertEqual(previous, before)
+            self.assertGreater(current, previous)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import threading
+import unittest
+
+from metrics import Registry
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    def test_counters_sum_across_threads(self):
+        """Test per-thread shards, including those of exited threads, are summed"""
+        registry = Registry()
+        requests = registry.counter('requests_total', 'Requests', ('route',))
+        depth = registry.gauge('queue_depth', 'Queued jobs')
+
+        def work():
+            for _ in range(1000):
+                requests.inc('/a')
+            depth.dec()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            depth.inc()
+            thread.start()
+        for thread in threads:
+            thread.join()
+        requests.inc('/b', amount=2)
+
+        totals = registry.collect()
+        self.assertEqual(totals[('requests_total', ('/a',))], 4000)
+        self.assertEqual(totals[('requests_total', ('/b',))], 2)
+        self.assertEqual(totals[('queue_depth', ())], 0)
+        self.assertEqual(registry.collect(), totals)
+
+    def test_exited_shards_folded_without_scrape(self):
+        """Test shards of exited threads don't pile up when nothing scrapes"""
+        registry = Registry()
+        requests = registry.counter('requests_total', 'Requests')
+        for _ in range(2000):
+            thread = threading.Thread(target=requests.inc)
+            thread.start()
+            thread.join()
+
+        self.assertLessEqual(len(registry._shards), 1)
+        self.assertEqual(registry.collect()[('requests_total', ())], 2000)
+
+    def test_histogram_exposition(self):
+        """Test histograms render cumulative buckets, sum and count"""
+        registry = Registry()
+        latency = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, '/a"b')
+        registry.gauge('ratio', 'Ratio', callback=lambda: 0.5)
+
+        self.assertEqual(registry.render().splitlines(), [
+            '# HELP latency_seconds Latency',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+            'latency_seconds_bucket{route="/a\\"b",le="1.0"} 3',
+            'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+            'latency_seconds_sum{route="/a\\"b"} 3.65',
+            'latency_seconds_count{route="/a\\"b"} 4',
+            '# HELP ratio Ratio',
+            '# TYPE ratio gauge',
+            'ratio 0.5',
+        ])
+
+    def test_duplicate_metric(self):
+        """Test registering the same name twice fails"""
+        registry = Registry()
+        registry.counter('requests_total', 'Requests')
+        with self.assertRaises(ValueError):
+            registry.counter('requests_total', 'Requests')
+
+
+if __name__ == '__main__':
+    unittest.main()
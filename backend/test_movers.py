@@ -0,0 +1,50 @@
+import json
+import unittest
+
+from market_universe import MarketUniverse
+from movers import MoversBoard
+
+
+class MoversBoardTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.universe = MarketUniverse()
+        self.board = MoversBoard(depth=3, limits=(2,))
+        self.universe.subscribe(self.board.update)
+
+    def rebuild(self):
+        self.universe.rebuild([
+            {'id': 'bitcoin', 'price_change_percentage_24h': 2.0, 'total_volume': 30.0},
+            {'id': 'ethereum', 'price_change_percentage_24h': -4.0, 'total_volume': 20.0},
+            {'id': 'solana', 'price_change_percentage_24h': 9.0, 'total_volume': 5.0},
+            {'id': 'tether', 'price_change_percentage_24h': None, 'total_volume': 50.0},
+            {'id': 'dogecoin', 'price_change_percentage_24h': -1.0, 'total_volume': 1.0},
+        ], ts=1234)
+
+    def ranked_ids(self, kind, limit):
+        return [coin['id'] for coin in json.loads(self.board.body(kind, limit))['coins']]
+
+    def test_rankings_per_kind(self):
+        """Test gainers, losers and volume boards rank the whole snapshot"""
+        self.rebuild()
+        self.assertEqual(self.ranked_ids('gainers', 3), ['solana', 'bitcoin', 'dogecoin'])
+        self.assertEqual(self.ranked_ids('losers', 2), ['ethereum', 'dogecoin'])
+        self.assertEqual(self.ranked_ids('volume', 3), ['tether', 'bitcoin', 'ethereum'])
+        self.assertEqual(json.loads(self.board.body('volume', 1))['updated_at'], 1234)
+
+    def test_bodies_are_preserialized(self):
+        """Test default limits are serialized on update and reused as-is"""
+        self.rebuild()
+        self.assertIs(self.board.body('gainers', 2), self.board.body('gainers', 2))
+
+    def test_invalid_requests(self):
+        """Test unknown kinds, out-of-range limits and empty boards"""
+        self.assertIsNone(self.board.body('gainers', 2))
+        with self.assertRaises(ValueError):
+            self.board.body('trending', 2)
+        with self.assertRaises(ValueError):
+            self.board.body('gainers', 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
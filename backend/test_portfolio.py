@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from market_universe import MarketSnapshot
+from portfolio import Valuation, value_history
+
+HOUR = 3_600_000
+
+
+class ValuationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        snapshot = MarketSnapshot([
+            {'id': 'bitcoin', 'current_price': 50000.0},
+            {'id': 'ethereum', 'current_price': 2500.0},
+        ])
+        self.valuation = Valuation(
+            owners=[1, 2, 1, 1],
+            crypto_ids=['bitcoin', 'bitcoin', 'ethereum', 'delisted-coin'],
+            quantities=[0.5, 1.0, 4.0, 100.0],
+            cost_basis=[20000.0, 60000.0, 8000.0, 50.0],
+            snapshot=snapshot,
+        )
+
+    def test_owner_summary(self):
+        """Test totals, P&L and unpriced holdings per owner"""
+        summary = self.valuation.summary(1)
+        self.assertEqual(summary['total_value'], 35000.0)
+        self.assertEqual(summary['total_cost_basis'], 28050.0)
+        self.assertEqual(summary['unrealized_pnl'], 7000.0)
+        self.assertAlmostEqual(summary['unrealized_pnl_percentage'], 25.0)
+        self.assertEqual(summary['unpriced_holdings'], 1)
+        self.assertEqual(self.valuation.summary(3)['total_value'], 0.0)
+
+    def test_holdings_allocation(self):
+        """Test per-holding rows are ordered by value with allocation shares"""
+        holdings = self.valuation.holdings(1)
+        self.assertEqual([h['crypto_id'] for h in holdings], ['bitcoin', 'ethereum', 'delisted-coin'])
+        self.assertAlmostEqual(holdings[0]['allocation'], 25000 / 35000)
+        self.assertIsNone(holdings[2]['value'])
+
+    def test_report_covers_every_owner(self):
+        """Test the admin report values all owners in one pass"""
+        report = self.valuation.report()
+        self.assertEqual([row['user_id'] for row in report], [2, 1])
+        self.assertEqual(report[0]['unrealized_pnl'], -10000.0)
+        self.assertEqual(report[1]['holdings'], 3)
+
+    def test_value_history(self):
+        """Test historical value is the quantity-weighted sum of aligned prices"""
+        grid, values = value_history([
+            (np.array([0, HOUR, 2 * HOUR]), np.array([10.0, 11.0, 12.0])),
+            (np.array([0, 2 * HOUR]), np.array([1.0, 2.0])),
+        ], [2.0, 10.0], 0, 2 * HOUR, HOUR)
+        self.assertEqual(grid.tolist(), [0, HOUR, 2 * HOUR])
+        self.assertEqual(values.tolist(), [30.0, 32.0, 44.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+import profiling
+from profiling import PROFILE_HEADER, ProfileStore, sign, verify
+
+
+class ProfilingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.engine = create_engine('sqlite://')
+        self.app = Flask(__name__)
+        self.store = profiling.install(self.app, ProfileStore(self.root, max_profiles=2), secret='s3cret')
+        self.addCleanup(event.remove, Engine, 'before_cursor_execute', profiling._query_started)
+        self.addCleanup(event.remove, Engine, 'after_cursor_execute', profiling._query_finished)
+
+        @self.app.route('/api/slow')
+        def slow():
+            with self.engine.connect() as conn:
+                for _ in range(3):
+                    conn.execute(text('SELECT 1'))
+            return jsonify({'ok': True})
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_signature(self):
+        """Test signatures are bound to method, path and time"""
+        value = sign('s3cret', 'GET', '/api/slow', ts=1000)
+        self.assertTrue(verify('s3cret', value, 'GET', '/api/slow', now=1100))
+        self.assertFalse(verify('s3cret', value, 'POST', '/api/slow', now=1100))
+        self.assertFalse(verify('other', value, 'GET', '/api/slow', now=1100))
+        self.assertFalse(verify('s3cret', value, 'GET', '/api/slow', now=1000 + profiling.MAX_CLOCK_SKEW + 1))
+        self.assertFalse(verify('s3cret', 'garbage', 'GET', '/api/slow'))
+
+    def test_signed_request_is_profiled(self):
+        """Test a signed request writes stats and a summary with SQL timings"""
+        response = self.client.get('/api/slow', headers={PROFILE_HEADER: sign('s3cret', 'GET', '/api/slow')})
+        profile_id = response.headers['X-Profile-Id']
+        self.assertTrue(os.path.exists(os.path.join(self.root, f'{profile_id}.prof')))
+        with open(os.path.join(self.root, f'{profile_id}.json')) as fh:
+            summary = json.load(fh)
+        self.assertEqual((summary['route'], summary['status']), ('/api/slow', 200))
+        self.assertEqual(summary['sql']['count'], 3)
+        self.assertEqual(summary['sql']['statements'][0]['statement'], 'SELECT 1')
+
+    def test_unsigned_requests_are_not_profiled_and_store_is_bounded(self):
+        """Test only signed requests are profiled and old profiles are pruned"""
+        self.assertNotIn('X-Profile-Id', self.client.get('/api/slow').headers)
+        self.assertNotIn('X-Profile-Id', self.client.get('/api/slow', headers={PROFILE_HEADER: '1:abc'}).headers)
+        for _ in range(4):
+            self.client.get('/api/slow', headers={PROFILE_HEADER: sign('s3cret', 'GET', '/api/slow')})
+        self.assertEqual(len(os.listdir(self.root)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
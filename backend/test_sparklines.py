@@ -0,0 +1,58 @@
+import base64
+import unittest
+
+import numpy as np
+
+from market_universe import MarketSnapshot
+from sparklines import GAP, LEVELS, SparklineBook, compact, quantize, resample
+
+HOUR = 3_600_000
+
+
+class SparklinesTestCase(unittest.TestCase):
+
+    def test_resample_takes_last_price_per_bucket(self):
+        """Test each bucket holds the last price at or before its end"""
+        matrix = resample([([0, HOUR, 2 * HOUR + 1, 3 * HOUR], [1.0, 2.0, 3.0, 4.0]), ([2 * HOUR], [9.0])], 0, 4 * HOUR, 4)
+        self.assertEqual(matrix[0].tolist(), [2.0, 2.0, 4.0, 4.0])
+        self.assertTrue(np.isnan(matrix[1, 0]))
+        self.assertEqual(matrix[1, 1:].tolist(), [9.0, 9.0, 9.0])
+
+    def test_quantize_scales_rows_to_their_range(self):
+        """Test codes span 0..LEVELS per row, flat rows are 0 and gaps are GAP"""
+        lows, highs, codes = quantize(np.array([[10.0, 15.0, 20.0], [np.nan, 5.0, 5.0]]))
+        self.assertEqual(lows.tolist(), [10.0, 5.0])
+        self.assertEqual(highs.tolist(), [20.0, 5.0])
+        self.assertEqual(codes.tolist(), [[0, 127, LEVELS], [GAP, 0, 0]])
+
+    def test_compact_encodes_and_round_trips(self):
+        """Test encoded points decode to within one quantization step"""
+        prices = 100 + np.cumsum(np.random.default_rng(3).normal(0, 1, 500))
+        timestamps = np.arange(500, dtype=np.int64) * 60_000
+        line, missing = compact([(timestamps, prices), (None, None)], 0, 499 * 60_000, points=50)
+        self.assertIsNone(missing)
+        codes = np.frombuffer(base64.b64decode(line['points']), dtype=np.uint8)
+        self.assertEqual(codes.size, 50)
+        decoded = line['min'] + codes / LEVELS * (line['max'] - line['min'])
+        expected = resample([(timestamps, prices)], 0, 499 * 60_000, 50)[0]
+        self.assertLessEqual(np.abs(decoded - expected).max(), (line['max'] - line['min']) / LEVELS)
+
+    def test_book_computes_once_per_snapshot(self):
+        """Test the book loads every coin once per snapshot version"""
+        loads = []
+
+        def load(coin_id, start, end):
+            loads.append(coin_id)
+            return ([start, end], [1.0, 2.0]) if coin_id == 'bitcoin' else None
+
+        book = SparklineBook(load, points=8)
+        snapshot = MarketSnapshot([{'id': 'bitcoin'}, {'id': 'ethereum'}], ts=10 * HOUR, version=1)
+        bitcoin, ethereum = book.get(snapshot, ['bitcoin', 'ethereum'])
+        self.assertEqual(bitcoin['max'], 2.0)
+        self.assertIsNone(ethereum)
+        book.get(snapshot, ['bitcoin'])
+        self.assertEqual(loads, ['bitcoin', 'ethereum'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import tick_archive
+from tick_archive import TickArchive
+
+DAY = 86_400_000
+
+
+class TickArchiveTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.archive = TickArchive(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_range_read_binary_search(self):
+        """Test range reads return exactly the ticks inside [start, end]"""
+        ts = np.arange(10_000, dtype=np.int64) * 30_000
+        self.archive.extend('bitcoin', ts, ts * 0.5, ts, ts)
+
+        data = self.archive.range('bitcoin', 15_000, 90_000)
+        self.assertEqual(data['timestamps'].tolist(), [30_000, 60_000, 90_000])
+        self.assertEqual(data['price'].tolist(), [15_000.0, 30_000.0, 45_000.0])
+        self.assertIsInstance(data['price'], np.memmap)
+
+    def test_delta_encoding_spans_chunks(self):
+        """Test chunks roll over on row count and on int32 delta overflow"""
+        ts = np.arange(tick_archive.CHUNK_ROWS + 10, dtype=np.int64) * 1000
+        self.archive.extend('bitcoin', ts, ts, ts, ts)
+        self.archive.append('bitcoin', int(ts[-1]) + 60 * DAY, 1.0)
+
+        data = self.archive.range('bitcoin')
+        self.assertEqual(data['timestamps'].tolist(), ts.tolist() + [int(ts[-1]) + 60 * DAY])
+        self.assertEqual(self.archive.disk_usage('bitcoin') // len(data['timestamps']), tick_archive.BYTES_PER_TICK)
+
+    def test_reopen_and_append_only(self):
+        """Test a reopened archive sees prior ticks and rejects older ones"""
+        self.archive.append_snapshot([{'id': 'ethereum', 'current_price': 10, 'market_cap': None}], 1000)
+        reopened = TickArchive(self.root)
+        self.assertEqual(reopened.append('ethereum', 500, 9), 0)
+        self.assertEqual(reopened.append('ethereum', 2000, 11), 1)
+
+        data = reopened.range('ethereum')
+        self.assertEqual(data['timestamps'].tolist(), [1000, 2000])
+        self.assertTrue(np.isnan(data['market_cap'][0]))
+
+    def test_torn_append_opening_a_chunk(self):
+        """Test a crash after the chunk table but before the columns is trimmed on load"""
+        with mock.patch.object(tick_archive, 'CHUNK_ROWS', 2):
+            self.archive.extend('bitcoin', [1000, 2000, 3000], [1.0, 2.0, 3.0], [1.0] * 3, [1.0] * 3)
+        path = os.path.join(self.root, 'bitcoin')
+        # The new chunk's record is half written and its first row never reached ts.i32
+        for name, size in (('ts.i32', 8), ('chunks.i64', 24)):
+            with open(os.path.join(path, name), 'r+b') as fh:
+                fh.truncate(size)
+
+        reopened = TickArchive(self.root)
+        self.assertEqual(reopened.range('bitcoin')['timestamps'].tolist(), [1000, 2000])
+        with mock.patch.object(tick_archive, 'CHUNK_ROWS', 2):
+            self.assertEqual(reopened.extend('bitcoin', [2500, 2600], [2.5, 2.6], [1.0] * 2, [1.0] * 2), 2)
+        self.assertEqual(TickArchive(self.root).range('bitcoin', 2000)['timestamps'].tolist(), [2000, 2500, 2600])
+
+    def test_series_downsamples_to_last_tick(self):
+        """Test series keeps the last tick in each interval bucket"""
+        ts = np.arange(0, 4 * 3_600_000, 600_000, dtype=np.int64)
+        self.archive.extend('bitcoin', ts, np.arange(ts.size), ts, ts)
+
+        data = self.archive.series('bitcoin', interval=3_600_000)
+        self.assertEqual(data['price'].tolist(), [5.0, 11.0, 17.0, 23.0])
+
+    def test_iter_range_respects_mapped_cap(self):
+        """Test batched reads register coins in the mapped LRU and unmap past the cap"""
+        ts = np.arange(10, dtype=np.int64) * 1000
+        coin_ids = [f'coin-{i}' for i in range(5)]
+        for coin_id in coin_ids:
+            self.archive.extend(coin_id, ts, ts, ts, ts)
+
+        with mock.patch.object(tick_archive, 'MAX_MAPPED_COINS', 2):
+            for coin_id in coin_ids:
+                rows = sum(len(data['timestamps']) for data in self.archive.iter_range(coin_id, batch_rows=4))
+                self.assertEqual(rows, 10)
+
+        self.assertEqual(list(self.archive._mapped), coin_ids[-2:])
+        mapped = [coin_id for coin_id in coin_ids if self.archive._coins[coin_id]._maps is not None]
+        self.assertEqual(mapped, coin_ids[-2:])
+
+    def test_unknown_or_invalid_coin(self):
+        """Test missing and path-like coin ids read as empty"""
+        self.assertIsNone(self.archive.range('dogecoin'))
+        self.assertIsNone(self.archive.range('../etc'))
+        with self.assertRaises(ValueError):
+            self.archive.append('../etc', 0, 1.0)
+
+    def test_reads_of_unknown_coins_are_not_cached(self):
+        """Test lookups of coins that were never archived don't create entries"""
+        for i in range(100):
+            coin_id = f'unknown-{i}'
+            self.assertIsNone(self.archive.range(coin_id))
+            self.assertIsNone(self.archive.first_ts(coin_id))
+            self.assertFalse(self.archive.has(coin_id))
+            self.assertEqual(list(self.archive.iter_range(coin_id)), [])
+        self.assertEqual(self.archive._coins, {})
+        self.assertEqual(os.listdir(self.root), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,307 @@
+"""
+Append-only, per-coin columnar archive of market ticks.
+
+Each coin gets a directory of flat binary columns that are memory-mapped
+for reads, so range slices come back as NumPy views without copying:
+
+    ts.i32      timestamp delta from the owning chunk's base (ms)
+    chunks.i64  (base_ts, first_row) pairs, one per chunk
+    price.f64   price
+    cap.f32     market cap
+    volume.f32  24h volume
+
+Timestamps are frame-of-reference encoded: a chunk holds up to CHUNK_ROWS
+ticks whose int32 deltas are relative to the chunk's int64 base. Lookups
+bisect the (small) chunk table and then the delta column of one chunk.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CHUNK_ROWS = 4096
+# Coins whose columns stay mapped at once (each mapping holds a file descriptor)
+MAX_MAPPED_COINS = 128
+INT32_MAX = np.iinfo(np.int32).max
+
+COLUMNS = {
+    'ts': ('ts.i32', np.int32),
+    'price': ('price.f64', np.float64),
+    'market_cap': ('cap.f32', np.float32),
+    'volume': ('volume.f32', np.float32),
+}
+CHUNKS_FILE = 'chunks.i64'
+
+# Bytes written per tick, excluding the amortized chunk table
+BYTES_PER_TICK = sum(np.dtype(dtype).itemsize for _, dtype in COLUMNS.values())
+
+_VALID_ID = re.compile(r'^[a-z0-9][a-z0-9._-]{0,99}$')
+
+
+def _map(path, dtype, count, shape=None):
+    if count == 0:
+        return np.empty(shape or (0,), dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=shape or (count,))
+
+
+class CoinArchive:
+    """Columns for a single coin; appends go to disk, reads go through memmaps"""
+
+    def __init__(self, path):
+        self.path = path
+        self._maps = None
+        self._mapped_rows = -1
+        self.rows = 0
+        self.chunks = np.empty((0, 2), dtype=np.int64)
+        self.last_ts = None
+        if os.path.isdir(path):
+            self._load()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        sizes = []
+        for name, dtype in COLUMNS.values():
+            path = self._file(name)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            sizes.append(size // np.dtype(dtype).itemsize)
+        # A torn append leaves some columns longer; the shortest one wins
+        self.rows = min(sizes)
+        chunks_path = self._file(CHUNKS_FILE)
+        if os.path.exists(chunks_path):
+            table = np.fromfile(chunks_path, dtype=np.int64)
+            self.chunks = table[:table.size - table.size % 2].reshape(-1, 2)
+            self.chunks = self.chunks[self.chunks[:, 1] < self.rows] if self.rows else self.chunks[:0]
+        # Cut the torn tail off on disk too, or the next append would land after it
+        lengths = {name: self.rows * np.dtype(dtype).itemsize for name, dtype in COLUMNS.values()}
+        lengths[CHUNKS_FILE] = self.chunks.nbytes
+        for name, length in lengths.items():
+            path = self._file(name)
+            if os.path.exists(path) and os.path.getsize(path) > length:
+                os.truncate(path, length)
+        if self.rows:
+            last_delta = np.fromfile(self._file(COLUMNS['ts'][0]), dtype=np.int32)[self.rows - 1]
+            self.last_ts = int(self.chunks[-1, 0]) + int(last_delta)
+
+    def extend(self, ts, price, market_cap, volume):
+        """Append rows with strictly increasing timestamps; returns rows written"""
+        ts = np.asarray(ts, dtype=np.int64)
+        if ts.size == 0:
+            return 0
+        keep = np.ones(ts.size, dtype=bool)
+        keep[1:] = np.diff(ts) > 0
+        if self.last_ts is not None:
+            keep &= ts > self.last_ts
+        if not keep.all():
+            ts = ts[keep]
+            price, market_cap, volume = (np.asarray(c)[keep] for c in (price, market_cap, volume))
+        if ts.size == 0:
+            return 0
+
+        os.makedirs(self.path, exist_ok=True)
+        deltas = np.empty(ts.size, dtype=np.int32)
+        new_chunks = []
+        i = 0
+        while i < ts.size:
+            if self.chunks.shape[0] and not new_chunks:
+                base, first = self.chunks[-1]
+            elif new_chunks:
+                base, first = new_chunks[-1]
+            else:
+                base, first = None, 0
+            used = self.rows + i - first
+            if base is None or used >= CHUNK_ROWS or ts[i] - base > INT32_MAX:
+                base, first, used = int(ts[i]), self.rows + i, 0
+                new_chunks.append((base, first))
+            limit = min(ts.size, i + CHUNK_ROWS - used)
+            stop = i + int(np.searchsorted(ts[i:limit], base + INT32_MAX, side='right'))
+            deltas[i:stop] = ts[i:stop] - base
+            i = stop
+
+        # Chunk table first, then value columns, timestamps last: a torn write leaves chunks
+        # starting past the last complete row, which are trimmed on load with the rows
+        if new_chunks:
+            block = np.asarray(new_chunks, dtype=np.int64)
+            with open(self._file(CHUNKS_FILE), 'ab') as fh:
+                block.tofile(fh)
+            self.chunks = np.concatenate([self.chunks, block])
+        for key, values in (('price', price), ('market_cap', market_cap), ('volume', volume), ('ts', deltas)):
+            name, dtype = COLUMNS[key]
+            with open(self._file(name), 'ab') as fh:
+                np.asarray(values, dtype=dtype).tofile(fh)
+        self.rows += ts.size
+        self.last_ts = int(ts[-1])
+        return int(ts.size)
+
+    def _mapped(self):
+        if self._mapped_rows != self.rows:
+            self._maps = {
+                key: _map(self._file(name), dtype, self.rows) for key, (name, dtype) in COLUMNS.items()
+            }
+            self._mapped_rows = self.rows
+        return self._maps
+
+    def _search(self, ts, side):
+        if self.rows == 0:
+            return 0
+        bases, firsts = self.chunks[:, 0], self.chunks[:, 1]
+        c = int(np.searchsorted(bases, ts, side='right')) - 1
+        if c < 0:
+            return 0
+        lo = int(firsts[c])
+        hi = int(firsts[c + 1]) if c + 1 < len(firsts) else self.rows
+        delta = min(max(ts - int(bases[c]), -1), INT32_MAX)
+        return lo + int(np.searchsorted(self._mapped()['ts'][lo:hi], delta, side=side))
+
+    def bounds(self, start=None, end=None):
+        """Row interval [lo, hi) holding start <= ts <= end"""
+        lo = 0 if start is None else self._search(start, 'left')
+        hi = self.rows if end is None else self._search(end, 'right')
+        return lo, max(lo, hi)
+
+    def range(self, start=None, end=None):
+        """Rows with start <= ts <= end; value columns are zero-copy memmap views"""
+        return self.slice(*self.bounds(start, end))
+
+    def slice(self, lo, hi):
+        """Rows lo:hi with timestamps decoded"""
+        maps = self._mapped()
+        firsts = self.chunks[:, 1]
+        c_lo = int(np.searchsorted(firsts, lo, side='right')) - 1
+        c_hi = int(np.searchsorted(firsts, hi, side='left'))
+        bounds = np.clip(np.append(firsts[c_lo:c_hi], hi), lo, hi)
+        bases = np.repeat(self.chunks[c_lo:c_hi, 0], np.diff(bounds))
+        timestamps = bases + maps['ts'][lo:hi]
+        return {
+            'timestamps': timestamps,
+            'price': maps['price'][lo:hi],
+            'market_cap': maps['market_cap'][lo:hi],
+            'volume': maps['volume'][lo:hi],
+        }
+
+    def unmap(self):
+        self._maps = None
+        self._mapped_rows = -1
+
+    @property
+    def first_ts(self):
+        return int(self.chunks[0, 0]) if self.rows else None
+
+
+class TickArchive:
+    """Directory of CoinArchive columns keyed by CoinGecko coin id"""
+
+    def __init__(self, root):
+        self.root = root
+        self._coins = {}
+        self._mapped = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _coin(self, coin_id):
+        if not _VALID_ID.match(coin_id):
+            raise ValueError(f'Invalid coin id: {coin_id!r}')
+        archive = self._coins.get(coin_id)
+        if archive is None:
+            archive = self._coins[coin_id] = CoinArchive(os.path.join(self.root, coin_id))
+        return archive
+
+    def _stored(self, coin_id):
+        # Reads never create entries, so lookups of unknown ids don't grow _coins
+        if not _VALID_ID.match(coin_id):
+            return None
+        archive = self._coins.get(coin_id)
+        if archive is None:
+            path = os.path.join(self.root, coin_id)
+            if not os.path.isdir(path):
+                return None
+            archive = self._coins[coin_id] = CoinArchive(path)
+        return archive
+
+    def has(self, coin_id):
+        with self._lock:
+            archive = self._stored(coin_id)
+            return archive is not None and archive.rows > 0
+
+    def append(self, coin_id, ts, price, market_cap=None, volume=None):
+        return self.extend(coin_id, [ts], [price], [market_cap], [volume])
+
+    def extend(self, coin_id, ts, price, market_cap, volume):
+        with self._lock:
+            return self._coin(coin_id).extend(
+                ts,
+                np.asarray(price, dtype=np.float64),
+                np.asarray(market_cap, dtype=np.float64),
+                np.asarray(volume, dtype=np.float64)
+            )
+
+    def append_snapshot(self, coins, ts):
+        """Archive one tick per coin from a /coins/markets payload"""
+        for coin in coins:
+            coin_id = coin.get('id')
+            price = coin.get('current_price')
+            if not coin_id or price is None or not _VALID_ID.match(coin_id):
+                continue
+            self.append(
+                coin_id, ts, price,
+                np.nan if coin.get('market_cap') is None else coin['market_cap'],
+                np.nan if coin.get('total_volume') is None else coin['total_volume']
+            )
+
+    def _touch(self, coin_id, archive):
+        # Caller holds _lock; mark the coin most recently read and unmap the least recent past the cap
+        self._mapped[coin_id] = archive
+        self._mapped.move_to_end(coin_id)
+        while len(self._mapped) > MAX_MAPPED_COINS:
+            self._mapped.popitem(last=False)[1].unmap()
+
+    def range(self, coin_id, start=None, end=None):
+        """Binary-searched slice of a coin's columns, or None if nothing is stored"""
+        with self._lock:
+            archive = self._stored(coin_id)
+            if archive is None or archive.rows == 0:
+                return None
+            self._touch(coin_id, archive)
+            return archive.range(start, end)
+
+    def iter_range(self, coin_id, start=None, end=None, batch_rows=CHUNK_ROWS):
+        """Yield range() in batches of at most `batch_rows` rows, so memory stays bounded.
+
+        Rows appended while iterating past `end` are not included.
+        """
+        with self._lock:
+            archive = self._stored(coin_id)
+            if archive is None or archive.rows == 0:
+                return
+            self._touch(coin_id, archive)
+            lo, hi = archive.bounds(start, end)
+        for batch in range(lo, hi, batch_rows):
+            with self._lock:
+                # Re-register: other reads may have evicted and unmapped it since the last batch
+                self._touch(coin_id, archive)
+                data = archive.slice(batch, min(hi, batch + batch_rows))
+            yield data
+
+    def first_ts(self, coin_id):
+        with self._lock:
+            archive = self._stored(coin_id)
+            return None if archive is None else archive.first_ts
+
+    def series(self, coin_id, start=None, end=None, interval=None):
+        """Range read downsampled to the last tick in each `interval` ms bucket"""
+        data = self.range(coin_id, start, end)
+        if data is None or interval is None or len(data['timestamps']) == 0:
+            return data
+        buckets = data['timestamps'] // interval
+        last = np.append(np.flatnonzero(np.diff(buckets)), len(buckets) - 1)
+        return {key: column[last] for key, column in data.items()}
+
+    def disk_usage(self, coin_id):
+        """Bytes on disk for one coin, chunk table included"""
+        path = os.path.join(self.root, coin_id)
+        if not os.path.isdir(path):
+            return 0
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
@@ -54,12 +54,7 @@ fi
 
 # Initialize database
 echo "🗄️ Initializing database..."
-python -c "
-from app import app, db
-with app.app_context():
-    db.create_all()
-    print('✅ Database initialized!')
-" 2>/dev/null
+python start.py --init-db 2>/dev/null
 
 if [ $? -ne 0 ]; then
     echo "⚠️  Database initialization had some issues, but continuing..."